@@ -1,4 +1,9 @@
-from typing import Callable
+import ast
+import bisect
+import csv
+import functools
+from collections import Counter, deque
+from typing import Any, Callable, Iterable, Iterator, Sequence, TextIO
 
 # --------------------------------------------------------------
 # 1) TMU Letter Grade Converter
@@ -24,11 +29,92 @@ def lettergrade(pct: int):
 
     '''
 
-    grades: list[str: (int,int)] = {
-        "F": (0,49), "D": (50,59), "C": (60,69), "B": (70,79), "A": (80,100)
-        }
-    grade = [key for key, val in grades.items() if (pct >= val[0] and pct <= val[1])]
-    return len(grade)>0 and grade[0] or None
+    return grader()(pct)
+
+
+# Grading scales are (lowest percentage, letter) pairs in ascending order
+BASIC_SCALE = ((0, "F"), (50, "D"), (60, "C"), (70, "B"), (80, "A"))
+PLUS_MINUS_SCALE = (
+    (0, "F"), (50, "D-"), (53, "D"), (57, "D+"), (60, "C-"), (63, "C"), (67, "C+"),
+    (70, "B-"), (73, "B"), (77, "B+"), (80, "A-"), (85, "A"), (90, "A+"),
+)
+
+@functools.lru_cache(maxsize=None)
+def grade_table(scale: tuple[tuple[int, str], ...] = BASIC_SCALE) -> tuple[str, ...]:
+
+    '''
+    Letter for every whole percentage from 0 to 100 on a scale,
+    built once per scale so grading is a single index.
+    '''
+
+    cuts = [cut for cut, _ in scale]
+    if cuts != sorted(cuts) or cuts[0] != 0:
+        raise ValueError("scale must start at 0 and be in ascending order")
+    return tuple(scale[bisect.bisect_right(cuts, pct) - 1][1] for pct in range(101))
+
+
+@functools.lru_cache(maxsize=None)
+def grader(scale: tuple[tuple[int, str], ...] = BASIC_SCALE) -> Callable[[int | float], str | None]:
+
+    '''
+    Return a function grading one percentage on 'scale' (None when it
+    is outside 0 to 100). Whole percentages are looked up in the table
+    of the scale, anything else falls back to a binary search on the
+    cut-points.
+    '''
+
+    table = grade_table(scale)
+    cuts = [cut for cut, _ in scale]
+
+    def grade(pct: int | float) -> str | None:
+        if not 0 <= pct <= 100:
+            return None
+        if pct == int(pct):
+            return table[int(pct)]
+        return scale[bisect.bisect_right(cuts, pct) - 1][1]
+
+    return grade
+
+
+def lettergrades(pcts: Iterable[int | float], scale: tuple[tuple[int, str], ...] = BASIC_SCALE) -> Iterator[str | None]:
+
+    '''
+    Batch version of lettergrade(): yields the letter for each
+    percentage in 'pcts' (a list, array, generator...) lazily.
+    '''
+
+    return map(grader(scale), pcts)
+
+
+def grade_csv(source: TextIO, dest: TextIO, column: str = "grade", scale: tuple[tuple[int, str], ...] = BASIC_SCALE) -> int:
+
+    '''
+    Copy a CSV gradebook from 'source' to 'dest', adding a "letter"
+    column graded from the percentages in 'column'. Rows are streamed
+    one at a time so the file size doesn't matter. Blank or
+    non-numeric percentages, or rows too short to have one, get an
+    empty letter.
+
+    Returns the number of rows written.
+    '''
+
+    reader = csv.DictReader(source)
+    if reader.fieldnames is None or column not in reader.fieldnames:
+        raise ValueError(f"no {column!r} column")
+    writer = csv.DictWriter(dest, fieldnames=[*reader.fieldnames, "letter"])
+    writer.writeheader()
+
+    grade = grader(scale)
+    rows = 0
+    for row in reader:
+        try:
+            row["letter"] = grade(float(row[column])) or ""
+        except (TypeError, ValueError):
+            # Non-numeric grade, or a short row with no grade at all
+            row["letter"] = ""
+        writer.writerow(row)
+        rows += 1
+    return rows
 
 
 # --------------------------------------------------------------
@@ -65,21 +151,20 @@ def duplicates(items: list | (str) | str):
     '''
 
     length = len(items)
-    amount = 0
 
     if length != 3:
         return "invalid input"
 
-    a,b,c = items
-
-    if (a == b) and (a == c) and (b == c):
-        amount = "three-of-a-kind"
-    elif (a == b) or (a == c) or (b == c):
-        amount = "two-of-a-kind"
-    elif (a != b) and (a != c) or (b != c):
-        amount = "one-of-a-kind"
-
-    return amount
+    try:
+        return kind(items)
+    except TypeError:
+        # Unhashable values (e.g. lists) can't be counted, compare them instead
+        first, second, third = items
+        if first == second == third:
+            return "three-of-a-kind"
+        if first == second or second == third or first == third:
+            return "two-of-a-kind"
+        return "one-of-a-kind"
 
 
 # --------------------------------------------------------------
@@ -137,29 +222,7 @@ def inversions(items: list | (str) | str):
     if length != 3:
         return -1
 
-    inv = 0
-    typeof: bool = isinstance(items, str)
-    if typeof:
-        items = [items[0], items[1], items[2]]
-
-    copy = items.copy()
-    copy.sort()
-
-    if items == copy:
-        return 0
-
-    a,b,c = items
-    # Shift items
-    if a > b:
-        inv += 1
-
-    if a > c:
-        inv += 1
-
-    if b > c:
-        inv += 1
-
-    return inv
+    return count_inversions(items)
 
 
 
@@ -204,17 +267,20 @@ def increasing(items: list | (str) | str, strict: bool):
     if not isinstance(strict , bool):
         return 'invalid input'
 
-    a,b,c = items
-
-    if strict:
-        return True if (a<b) and (b<c) else False
-    else:
-        return True if (a<=b) and (b<=c) else False
+    return scan_runs(items, strict).ascending
 
 
 # --------------------------------------------------------------
 # 5) Python as a Calculator
 # --------------------------------------------------------------
+OPERATORS: dict[str, Callable[[Any, Any], Any]] = {
+    "+": lambda x, y: x + y,
+    "-": lambda x, y: x - y,
+    "*": lambda x, y: x * y,
+    "**": lambda x, y: x ** y,
+    "/": lambda x, y: x / y if y != 0 else None
+}
+
 def calculator(op1: int, op2: int, operator: str):
 
     '''
@@ -239,15 +305,411 @@ def calculator(op1: int, op2: int, operator: str):
     would be a division by zero, return None.
     '''
 
-    funcs: dict[str: Callable[[int,int], int | None]] = {
-        "+": lambda x, y: x + y,
-        "-": lambda x, y: x - y,
-        "*": lambda x, y: x * y,
-        "**": lambda x, y: x ** y,
-        "/": lambda x, y: x / y if y != 0 else None
-    }
+    func = OPERATORS.get(operator)
+    return func(op1, op2) if func else None
+
+
+# --------------------------------------------------------------
+# 6) Inversions of Anything
+# --------------------------------------------------------------
+def count_inversions(items: Sequence[Any]) -> int:
+
+    '''
+    The general version of inversions(): count the inversions of a
+    sequence of any length in O(n log n).
+
+    Values are replaced by their rank in the sorted sequence (found
+    by bisecting it, so unhashable values like lists work too), then
+    read right to left into a Fenwick (binary indexed) tree holding
+    how many of each rank has been seen so far. For each value, the
+    number of smaller values already in the tree is the number of
+    inversions it starts. Everything is a loop, so there is no
+    recursion limit to hit on long sequences.
+
+    count_inversions([3, 2, 1]) == 3
+    count_inversions('cat') == 1
+    count_inversions([]) == 0
+    '''
+
+    ordered = sorted(items)
+    tree = [0] * (len(ordered) + 1)
+    inv = 0
+
+    for value in reversed(items):
+        # Equal values share the rank of the first of them
+        rank = bisect.bisect_left(ordered, value) + 1
+        # Values already seen that are strictly smaller
+        i = rank - 1
+        while i > 0:
+            inv += tree[i]
+            i &= i - 1
+        # Mark this rank as seen
+        i = rank
+        while i < len(tree):
+            tree[i] += 1
+            i += i & -i
+
+    return inv
+
+
+class InversionWindow:
+
+    '''
+    Inversion count over the last 'size' items of a stream.
+
+    Instead of recounting the window every step, the window is also
+    kept sorted: a new value adds one inversion for every value in
+    the window greater than it, and the value falling out on the left
+    takes away one for every value smaller than it. Both are found
+    with a binary search.
+
+    window = InversionWindow(3)
+    [window.push(x) for x in [3, 1, 2, 0]] == [0, 1, 1, 2]
+    '''
+
+    def __init__(self, size: int) -> None:
+        if size < 1:
+            raise ValueError("window size must be at least 1")
+        self.size = size
+        self.inversions = 0
+        self.items: deque[Any] = deque()
+        self.ordered: list[Any] = []
+
+    def push(self, value: Any) -> int:
+        '''
+        Add a value, dropping the oldest one if the window is full,
+        and return the inversion count of the window.
+        '''
+
+        if len(self.items) == self.size:
+            oldest = self.items.popleft()
+            pos = bisect.bisect_left(self.ordered, oldest)
+            self.inversions -= pos
+            del self.ordered[pos]
+
+        self.inversions += len(self.ordered) - bisect.bisect_right(self.ordered, value)
+        bisect.insort_right(self.ordered, value)
+        self.items.append(value)
+        return self.inversions
+
+
+def window_inversions(items: Iterable[Any], size: int):
+
+    '''
+    Generator of the inversion count of every window of 'size'
+    consecutive items (the first few windows are shorter while
+    the stream fills up).
+    '''
+
+    window = InversionWindow(size)
+    for value in items:
+        yield window.push(value)
 
-    if not operator in funcs:
+
+# --------------------------------------------------------------
+# 7) Duplicates of Anything
+# --------------------------------------------------------------
+KIND_WORDS = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
+
+def multiplicity(items: Iterable[Any]) -> dict[int, int]:
+
+    '''
+    The multiplicity profile of a sequence or stream: for each
+    number of repeats, how many distinct values are repeated that
+    many times. One hashing pass over the items.
+
+    multiplicity('banana') == {1: 1, 2: 1, 3: 1}   (b once, n twice, a three times)
+    multiplicity([7, 7, 8, 8]) == {2: 2}
+    '''
+
+    return dict(sorted(Counter(Counter(items).values()).items()))
+
+
+def kind(items: Iterable[Any]) -> str:
+
+    '''
+    The general version of duplicates(): name a sequence of any
+    length after its most repeated value, e.g. 'three-of-a-kind'.
+    Past ten the count is written in digits ('12-of-a-kind'), and
+    an empty sequence is 'zero-of-a-kind'.
+    '''
+
+    most = max(multiplicity(items), default=0)
+    word = KIND_WORDS[most] if most < len(KIND_WORDS) else str(most)
+    return f"{word}-of-a-kind"
+
+
+def heavy_hitters(items: Iterable[Any], k: int) -> dict[Any, int]:
+
+    '''
+    Approximate counts of the most repeated values of a stream too
+    big to count exactly (Misra-Gries), using at most k counters.
+
+    Every value seen more than n / (k + 1) times is in the result,
+    and each count is at most n / (k + 1) below the real one.
+    '''
+
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    counters: dict[Any, int] = {}
+    for value in items:
+        if value in counters:
+            counters[value] += 1
+        elif len(counters) < k:
+            counters[value] = 1
+        else:
+            # No room, every counter (and the new value) loses one
+            for key in list(counters):
+                counters[key] -= 1
+                if not counters[key]:
+                    del counters[key]
+    return counters
+
+
+class CountMinSketch:
+
+    '''
+    Fixed-size table answering "how many times was this added?"
+    for a stream, without storing the values. Estimates are never
+    too low; with width w they are too high by at most about
+    2n / w, with a depth of d independent rows making a bad
+    estimate roughly 2^-d likely.
+
+    Hashes use Python's hash(), so a sketch is only meaningful
+    within the process that built it.
+    '''
+
+    def __init__(self, width: int = 2048, depth: int = 4) -> None:
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1")
+        self.width = width
+        self.depth = depth
+        self.total = 0
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def add(self, value: Any, count: int = 1) -> None:
+        '''
+        Count 'value' 'count' more times
+        '''
+        self.total += count
+        for seed, row in enumerate(self.rows):
+            row[hash((seed, value)) % self.width] += count
+
+    def update(self, items: Iterable[Any]) -> None:
+        '''
+        Count every value of a stream once
+        '''
+        for value in items:
+            self.add(value)
+
+    def estimate(self, value: Any) -> int:
+        '''
+        Upper estimate of how many times 'value' was added
+        '''
+        return min(row[hash((seed, value)) % self.width] for seed, row in enumerate(self.rows))
+
+
+# --------------------------------------------------------------
+# 8) Ascending Runs of Anything
+# --------------------------------------------------------------
+class RunSummary:
+
+    '''
+    What scan_runs() found in one chunk of a sequence: where each
+    ascending run starts, the longest run, and the first and last
+    values so the chunk can be joined with its neighbours.
+
+    Positions are indexes into the whole sequence, so chunks scanned
+    separately (e.g. by worker processes reading parts of a file) can
+    be combined in order with join() into the summary of the whole.
+    '''
+
+    def __init__(self, start: int, length: int, first: Any, last: Any, breaks: list[int], longest: tuple[int, int], strict: bool) -> None:
+        self.start = start
+        self.length = length
+        self.first = first
+        self.last = last
+        # Index of the first item of every run but the first one
+        self.breaks = breaks
+        # (start, length) of the longest run, the earliest one on a tie
+        self.longest = longest
+        self.strict = strict
+
+    @property
+    def end(self) -> int:
+        '''
+        Index just past the chunk
+        '''
+        return self.start + self.length
+
+    @property
+    def ascending(self) -> bool:
+        '''
+        Whether the whole chunk is one ascending run
+        '''
+        return not self.breaks
+
+    def runs(self) -> list[tuple[int, int]]:
+        '''
+        (start, stop) index range of every ascending run, in order
+        '''
+        if not self.length:
+            return []
+        starts = [self.start, *self.breaks]
+        return list(zip(starts, [*self.breaks, self.end]))
+
+    def join(self, other: "RunSummary") -> "RunSummary":
+        '''
+        Summary of this chunk followed directly by 'other'
+        '''
+        if not other.length:
+            return self
+        if not self.length:
+            return other
+        if other.start != self.end or other.strict != self.strict:
+            raise ValueError("chunks must be adjacent and scanned the same way")
+
+        joined = self.last < other.first if self.strict else self.last <= other.first
+        breaks = self.breaks + ([] if joined else [other.start]) + other.breaks
+
+        longest = max(self.longest, other.longest, key=lambda run: (run[1], -run[0]))
+        if joined:
+            # The last run of this chunk carries on into the other one
+            suffix_start = self.breaks[-1] if self.breaks else self.start
+            prefix_end = other.breaks[0] if other.breaks else other.end
+            longest = max(longest, (suffix_start, prefix_end - suffix_start), key=lambda run: (run[1], -run[0]))
+
+        return RunSummary(self.start, self.length + other.length, self.first, other.last, breaks, longest, self.strict)
+
+
+def scan_runs(items: Iterable[Any], strict: bool = False, start: int = 0) -> RunSummary:
+
+    '''
+    The general version of increasing(): one pass over a sequence
+    or stream of any length, finding its ascending (or strictly
+    ascending) runs. 'start' is the index of the first item when
+    scanning one chunk of a larger sequence.
+
+    scan_runs([1, 2, 2, 0, 5]).runs() == [(0, 3), (3, 5)]
+    scan_runs([1, 2, 2, 0, 5], strict=True).longest == (0, 2)
+
+    To split the work, scan adjacent chunks (in any process) and
+    join the summaries in order, e.g. with chunks of
+    (items, strict, start) tuples:
+
+    functools.reduce(RunSummary.join, pool.starmap(scan_runs, chunks))
+    '''
+
+    breaks: list[int] = []
+    longest = (start, 0)
+    first = last = None
+    run_start = start
+    length = 0
+
+    for index, value in enumerate(items, start):
+        if not length:
+            first = value
+        elif (last >= value) if strict else (last > value):
+            if index - run_start > longest[1]:
+                longest = (run_start, index - run_start)
+            breaks.append(index)
+            run_start = index
+        last = value
+        length += 1
+
+    if start + length - run_start > longest[1]:
+        longest = (run_start, start + length - run_start)
+    return RunSummary(start, length, first, last, breaks, longest, strict)
+
+
+# --------------------------------------------------------------
+# 9) Python as a Calculator, Compiled
+# --------------------------------------------------------------
+AST_OPERATORS = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*", ast.Pow: "**", ast.Div: "/"}
+# Size limit of an integer ** result, in bits; 9**9**9**9 would never finish
+MAX_POWER_BITS = 1_000_000
+
+def _power(x: Any, y: Any) -> Any:
+    if isinstance(x, int) and isinstance(y, int) and y > 0 and (abs(x).bit_length() - 1) * y > MAX_POWER_BITS:
+        raise ValueError(f"power too large: {x} ** {y}")
+    # 0 to a negative power divides by zero
+    if x == 0 and y < 0:
         return None
+    try:
+        return x ** y
+    except OverflowError as e:
+        raise ValueError(f"power too large: {x} ** {y}") from e
+
+def _compile_node(node: ast.AST) -> Callable[[Any], Any]:
+
+    '''
+    Turn one node of a parsed expression into a function of the
+    variables. Only numbers, variable names, + - * / ** and signs
+    are accepted, anything else is a ValueError, so no user text
+    is ever passed to eval(). Integer powers past MAX_POWER_BITS
+    and float powers that overflow are a ValueError too when they
+    are evaluated.
+    '''
+
+    match node:
+        case ast.Constant(value=value) if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return lambda row: value
+        case ast.Name(id=name):
+            return lambda row: row[name]
+        case ast.UnaryOp(op=ast.USub() | ast.UAdd() as op, operand=operand):
+            inner = _compile_node(operand)
+            if isinstance(op, ast.UAdd):
+                return inner
+            def negate(row):
+                value = inner(row)
+                return None if value is None else -value
+            return negate
+        case ast.BinOp(left=left, op=op, right=right) if type(op) in AST_OPERATORS:
+            func = _power if isinstance(op, ast.Pow) else OPERATORS[AST_OPERATORS[type(op)]]
+            first, second = _compile_node(left), _compile_node(right)
+            def binary(row):
+                x, y = first(row), second(row)
+                # A division by zero anywhere makes the whole result None
+                return None if x is None or y is None else func(x, y)
+            return binary
+        case _:
+            raise ValueError(f"unsupported expression: {ast.dump(node)}")
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(expr: str) -> Callable[[Any], Any]:
+
+    '''
+    Parse an infix expression such as '(a + 2) ** b / c' once and
+    return a function that evaluates it for a mapping of variable
+    values. Compiled expressions are cached by their text, so the
+    same formula is only parsed the first time.
+
+    Like calculator(), dividing by zero gives None instead of an error.
+    '''
+
+    try:
+        tree = ast.parse(expr.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"invalid expression: {expr!r}") from e
+    return _compile_node(tree.body)
+
+
+def evaluate(expr: str, variables: dict[str, Any] | None = None) -> Any:
+
+    '''
+    Value of an expression, e.g. evaluate('x * 2 + 1', {'x': 4}) == 9
+    '''
+
+    return compile_expression(expr)(variables or {})
+
+
+def evaluate_many(expr: str, rows: Iterable[dict[str, Any]]) -> list[Any]:
+
+    '''
+    Value of one expression for every row of variables, compiling
+    it only once for the whole batch.
+    '''
 
-    return funcs[operator](op1, op2)
+    func = compile_expression(expr)
+    return [func(row) for row in rows]
@@ -1,5 +1,7 @@
 #!/usr/bin/python3
+import io
 import unittest
+from array import array
 import lab3_funcs
 
 class TestLab3(unittest.TestCase):
@@ -37,6 +39,30 @@ class TestLab3(unittest.TestCase):
         self.assertIsNone(lab3_funcs.lettergrade(-10))
         self.assertIsNone(lab3_funcs.lettergrade(105))
         self.assertIsNone(lab3_funcs.lettergrade(101))
+    def test_lettergrades(self):
+        ''' test_lettergrades '''
+        pcts = list(range(-5, 106))
+        self.assertEqual(list(lab3_funcs.lettergrades(pcts)), [lab3_funcs.lettergrade(pct) for pct in pcts])
+        self.assertEqual(list(lab3_funcs.lettergrades(array('d', [79.5, 80.0, 100.5]))), ['B', 'A', None])
+    def test_lettergrades_plus_minus(self):
+        ''' test_lettergrades_plus_minus '''
+        grades = lab3_funcs.lettergrades([49, 52, 56.5, 57, 72, 79, 84, 90, 100], lab3_funcs.PLUS_MINUS_SCALE)
+        self.assertEqual(list(grades), ['F', 'D-', 'D', 'D+', 'B-', 'B+', 'A-', 'A+', 'A+'])
+        self.assertRaises(ValueError, lab3_funcs.grade_table, ((50, 'D'), (0, 'F')))
+    def test_grade_csv(self):
+        ''' test_grade_csv '''
+        source = io.StringIO("name,grade\nann,91\nbob,49.5\ncy,\n")
+        dest = io.StringIO()
+        self.assertEqual(lab3_funcs.grade_csv(source, dest), 3)
+        self.assertEqual(dest.getvalue().splitlines(), ['name,grade,letter', 'ann,91,A', 'bob,49.5,F', 'cy,,'])
+        self.assertRaises(ValueError, lab3_funcs.grade_csv, io.StringIO("name\nann\n"), io.StringIO())
+
+    def test_grade_csv_ragged(self):
+        ''' test_grade_csv_ragged '''
+        source = io.StringIO("name,grade,note\nann,91,ok\nbob\ncy,abc\n")
+        dest = io.StringIO()
+        self.assertEqual(lab3_funcs.grade_csv(source, dest), 3)
+        self.assertEqual(dest.getvalue().splitlines(), ['name,grade,note,letter', 'ann,91,ok,A', 'bob,,,', 'cy,abc,,'])
 
 
     def test_three_of_a_kind(self):
@@ -54,6 +80,11 @@ class TestLab3(unittest.TestCase):
         self.assertEqual(lab3_funcs.duplicates([1, 2, 3]), 'one-of-a-kind')
         self.assertEqual(lab3_funcs.duplicates((4, 5, 6)), 'one-of-a-kind')
         self.assertEqual(lab3_funcs.duplicates('xyz'), 'one-of-a-kind')
+    def test_duplicates_unhashable(self):
+        ''' test_duplicates_unhashable '''
+        self.assertEqual(lab3_funcs.duplicates([[1], [1], [1]]), 'three-of-a-kind')
+        self.assertEqual(lab3_funcs.duplicates([[1], [1], [2]]), 'two-of-a-kind')
+        self.assertEqual(lab3_funcs.duplicates([[1], {2}, [3]]), 'one-of-a-kind')
     def test_duplicates_invalid(self):
         ''' test_invalid_input '''
         self.assertEqual(lab3_funcs.duplicates([]), 'invalid input')
@@ -63,6 +94,34 @@ class TestLab3(unittest.TestCase):
         self.assertEqual(lab3_funcs.duplicates(('a', 'b', 'c', 'd')), 'invalid input')
         self.assertEqual(lab3_funcs.duplicates('x'), 'invalid input')
         self.assertEqual(lab3_funcs.duplicates('xyzw'), 'invalid input')
+    def test_multiplicity(self):
+        ''' test_multiplicity '''
+        self.assertEqual(lab3_funcs.multiplicity('banana'), {1: 1, 2: 1, 3: 1})
+        self.assertEqual(lab3_funcs.multiplicity(iter([7, 7, 8, 8])), {2: 2})
+        self.assertEqual(lab3_funcs.multiplicity([]), {})
+    def test_kind(self):
+        ''' test_kind '''
+        self.assertEqual(lab3_funcs.kind([1, 2, 3, 4]), 'one-of-a-kind')
+        self.assertEqual(lab3_funcs.kind('mississippi'), 'four-of-a-kind')
+        self.assertEqual(lab3_funcs.kind([0] * 12), '12-of-a-kind')
+        self.assertEqual(lab3_funcs.kind(()), 'zero-of-a-kind')
+    def test_heavy_hitters(self):
+        ''' test_heavy_hitters '''
+        stream = [1] * 50 + list(range(2, 40)) + [2] * 30
+        hitters = lab3_funcs.heavy_hitters(stream, 4)
+        self.assertIn(1, hitters)
+        self.assertIn(2, hitters)
+        self.assertLessEqual(len(hitters), 4)
+        self.assertGreaterEqual(hitters[1], 50 - len(stream) // 5)
+        self.assertRaises(ValueError, lab3_funcs.heavy_hitters, stream, 0)
+    def test_count_min_sketch(self):
+        ''' test_count_min_sketch '''
+        sketch = lab3_funcs.CountMinSketch(64, 4)
+        sketch.update(['a'] * 100 + ['b'] * 10 + [str(i) for i in range(200)])
+        self.assertGreaterEqual(sketch.estimate('a'), 100)
+        self.assertLess(sketch.estimate('a'), 100 + 8 * sketch.total // 64)
+        self.assertGreaterEqual(sketch.estimate('b'), 10)
+        self.assertEqual(sketch.total, 310)
 
 
     def test_list_of_integer_inputs(self):
@@ -92,6 +151,22 @@ class TestLab3(unittest.TestCase):
         self.assertEqual(lab3_funcs.inversions(('a', 'b', 'c', 'd')), -1)
         self.assertEqual(lab3_funcs.inversions('x'), -1)
         self.assertEqual(lab3_funcs.inversions('xyzw'), -1)
+    def test_count_inversions(self):
+        ''' test_count_inversions '''
+        self.assertEqual(lab3_funcs.count_inversions([]), 0)
+        self.assertEqual(lab3_funcs.count_inversions([1, 2, 3, 4]), 0)
+        self.assertEqual(lab3_funcs.count_inversions([4, 3, 2, 1]), 6)
+        self.assertEqual(lab3_funcs.count_inversions([2, 2, 1, 1]), 4)
+        self.assertEqual(lab3_funcs.count_inversions('ton'), 3)
+        self.assertEqual(lab3_funcs.count_inversions(list(range(1000, 0, -1))), 1000 * 999 // 2)
+        self.assertEqual(lab3_funcs.count_inversions([[2], [1], [0]]), 3)
+        self.assertEqual(lab3_funcs.inversions([[2], [1], [0]]), 3)
+    def test_window_inversions(self):
+        ''' test_window_inversions '''
+        items = [5, 1, 4, 2, 2, 8, 0, 3]
+        expected = [lab3_funcs.count_inversions(items[max(0, i - 2):i + 1]) for i in range(len(items))]
+        self.assertEqual(list(lab3_funcs.window_inversions(items, 3)), expected)
+        self.assertRaises(ValueError, lab3_funcs.InversionWindow, 0)
 
 
     def test_increasing_strict(self):
@@ -113,6 +188,28 @@ class TestLab3(unittest.TestCase):
         self.assertEqual(lab3_funcs.increasing([1, 2, 3, 4], True), 'invalid input')
         self.assertEqual(lab3_funcs.increasing([1, 2, 3], None), 'invalid input')
         self.assertEqual(lab3_funcs.increasing([1, 2, 3], 'string'), 'invalid input')
+    def test_scan_runs(self):
+        ''' test_scan_runs '''
+        summary = lab3_funcs.scan_runs([1, 2, 2, 0, 5])
+        self.assertEqual(summary.runs(), [(0, 3), (3, 5)])
+        self.assertEqual(summary.longest, (0, 3))
+        self.assertFalse(summary.ascending)
+        self.assertEqual(lab3_funcs.scan_runs([1, 2, 2, 0, 5], True).longest, (0, 2))
+        self.assertTrue(lab3_funcs.scan_runs(iter('abcz')).ascending)
+        self.assertEqual(lab3_funcs.scan_runs([]).runs(), [])
+    def test_scan_runs_join(self):
+        ''' test_scan_runs_join '''
+        items = [3, 1, 2, 4, 4, 5, 0, 1, 2, 3, 9, 9, 1]
+        for strict in (True, False):
+            whole = lab3_funcs.scan_runs(items, strict)
+            for size in range(1, len(items) + 1):
+                parts = [lab3_funcs.scan_runs(items[i:i + size], strict, i) for i in range(0, len(items), size)]
+                joined = parts[0]
+                for part in parts[1:]:
+                    joined = joined.join(part)
+                self.assertEqual(joined.runs(), whole.runs())
+                self.assertEqual(joined.longest, whole.longest)
+        self.assertRaises(ValueError, lab3_funcs.scan_runs([1]).join, lab3_funcs.scan_runs([2], start=5))
 
 
     def test_addition(self):
@@ -145,6 +242,39 @@ class TestLab3(unittest.TestCase):
         self.assertIsNone(lab3_funcs.calculator(5, 3, 'invalid'))
         self.assertIsNone(lab3_funcs.calculator(2, 4, ''))
         self.assertIsNone(lab3_funcs.calculator(1, 1, None))
+    def test_evaluate(self):
+        ''' test_evaluate '''
+        self.assertEqual(lab3_funcs.evaluate('1 + 2 * 3'), 7)
+        self.assertEqual(lab3_funcs.evaluate('(a + 2) ** b / c', {'a': 1, 'b': 2, 'c': 3}), 3)
+        self.assertEqual(lab3_funcs.evaluate('-x + +2', {'x': 5}), -3)
+        self.assertEqual(lab3_funcs.evaluate('4 ** -1'), 0.25)
+        self.assertIsNone(lab3_funcs.evaluate('1 / (x - 1) + 5', {'x': 1}))
+        self.assertIsNone(lab3_funcs.evaluate('-(1 / 0)'))
+    def test_evaluate_invalid(self):
+        ''' test_evaluate_invalid '''
+        for expr in ['__import__("os")', 'x.y', '1 // 2', 'a if b else c', '1 +', 'True + 1', '"a" * 3']:
+            self.assertRaises(ValueError, lab3_funcs.evaluate, expr)
+    def test_evaluate_power_limit(self):
+        ''' test_evaluate_power_limit '''
+        self.assertEqual(lab3_funcs.evaluate('2 ** 1000'), 2 ** 1000)
+        self.assertEqual(lab3_funcs.evaluate('1 ** 10 ** 9 + (-1) ** 10 ** 9'), 2)
+        self.assertRaises(ValueError, lab3_funcs.evaluate, '9 ** 9 ** 9 ** 9')
+        self.assertRaises(ValueError, lab3_funcs.evaluate, 'x ** y', {'x': 10, 'y': 10 ** 7})
+        self.assertRaises(ValueError, lab3_funcs.evaluate, '10.0 ** 400')
+        self.assertRaises(ValueError, lab3_funcs.evaluate, 'x ** 2', {'x': 1e200})
+
+    def test_evaluate_zero_power(self):
+        ''' test_evaluate_zero_power '''
+        self.assertIsNone(lab3_funcs.evaluate('x ** -1', {'x': 0}))
+        self.assertIsNone(lab3_funcs.evaluate('0.0 ** -0.5 + 1'))
+        self.assertEqual(lab3_funcs.evaluate('0 ** 0'), 1)
+        self.assertEqual(lab3_funcs.evaluate_many('x ** -1', [{'x': 2}, {'x': 0}]), [0.5, None])
+
+    def test_evaluate_many(self):
+        ''' test_evaluate_many '''
+        rows = [{'x': 1, 'y': 2}, {'x': 3, 'y': 0}, {'x': -1, 'y': 4}]
+        self.assertEqual(lab3_funcs.evaluate_many('x / y', rows), [0.5, None, -0.25])
+        self.assertIs(lab3_funcs.compile_expression('x / y'), lab3_funcs.compile_expression('x / y'))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,69 @@
+'''
+    Throughput of the streaming number extraction in lab4_funcs, in MB/s.
+
+    Run from this directory:
+        python lab4_bench.py [--mb 64] [--workers 4]
+'''
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import lab4_funcs
+
+WORDS = ["INFO", "WARN", "request", "id", "took", "ms", "user", "temp", "ok", "retry"]
+
+def generate_log(path: str, megabytes: int, seed: int = 109) -> None:
+    '''
+    Write a synthetic log of about 'megabytes' MB mixing words and numbers
+    '''
+    rng = random.Random(seed)
+    target = megabytes * 2**20
+    with open(path, 'w', encoding="ascii") as file:
+        written = 0
+        while written < target:
+            line = " ".join(
+                rng.choice(WORDS) if rng.random() < 0.6 else f"{rng.uniform(-1e4, 1e4):.{rng.randint(0, 4)}f}"
+                for _ in range(12)
+            ) + "\n"
+            file.write(line)
+            written += len(line)
+
+def throughput(label: str, path: str, func) -> None:
+    '''
+    Time func once and print the rate over the file size
+    '''
+    size = os.path.getsize(path) / 2**20
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {size / elapsed:>8.1f} MB/s  ({result:,} values)")
+
+def main() -> None:
+    '''Main entry'''
+    parser = argparse.ArgumentParser(description="lab4 streaming extraction benchmark")
+    parser.add_argument("--mb", type=int, default=64, help="size of the generated log")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.log")
+        generate_log(path, args.mb)
+
+        def split_floats() -> int:
+            with open(path, 'r', encoding="ascii") as file:
+                return sum(1 for word in file.read().split() if word[-1].isdigit() and float(word) is not None)
+
+        def digits() -> int:
+            with open(path, 'rb') as file:
+                return sum(len(run) for run in lab4_funcs.iter_digits(file))
+
+        throughput("read + split (baseline)", path, split_floats)
+        throughput("read_numbers", path, lambda: len(lab4_funcs.read_numbers(path)))
+        throughput(f"read_numbers ({args.workers} workers)", path, lambda: len(lab4_funcs.read_numbers(path, workers=args.workers)))
+        throughput("iter_digits", path, digits)
+
+if __name__ == "__main__":
+    main()
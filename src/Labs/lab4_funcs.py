@@ -1,3 +1,16 @@
+import functools
+import itertools
+import math
+import numbers
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from typing import Any, BinaryIO, Iterable, Iterator
+
+DIGITS = "0123456789"
+
 # --------------------------------------------------------------
 # 1) Summing Evens
 # --------------------------------------------------------------
@@ -21,7 +34,7 @@ def sumeven(n: int):
 
     '''
 
-    return n * (n-1)
+    return even_power_sum(1, n)
 
 
 # --------------------------------------------------------------
@@ -45,7 +58,7 @@ def sumsquares(n: int):
 
     '''
 
-    return (n * (n+1) * (2*n+1)) / 6
+    return power_sum(2, n)
 
 
 # --------------------------------------------------------------
@@ -70,7 +83,7 @@ def odddigitsum(num: int):
 
     '''
 
-    return sum([int(n) for n in str(abs(num)) if int(n) % 2 != 0])
+    return digit_sums(num)[1]
 
 
 # --------------------------------------------------------------
@@ -94,7 +107,7 @@ def listexponential(n: int, base: int):
 
     '''
 
-    return [base**x for x in range(n)]
+    return list(exponentials(base, n))
 
 
 # --------------------------------------------------------------
@@ -185,19 +198,537 @@ def maxbytype(items: list):
 
     '''
 
-    largest = [0, 0.00, '']
-    clone = largest.copy()
-    for x in items:
-        if isinstance(x, int):
-            largest[0] = x if largest[0] < x else largest[0]
+    stats = TypeAggregator((int, float, str))
+    stats.update(items)
+    return stats.max(int), stats.max(float), stats.max(str)
+
+
+# --------------------------------------------------------------
+# 8) Summing Powers Exactly
+# --------------------------------------------------------------
+@functools.lru_cache(maxsize=None)
+def bernoulli(m: int):
+
+    '''
+    The m-th Bernoulli number as an exact Fraction (with B1 = +1/2,
+    the sign Faulhaber's formula wants), from the recurrence
+    sum(C(m+1, j) * B_j for j in 0..m) == 0. Every smaller one is
+    cached along the way.
+    '''
+
+    if m == 0:
+        return Fraction(1)
+    if m == 1:
+        return Fraction(1, 2)
+    # The recurrence is for B1 = -1/2, flip it back for the j == 1 term
+    total = sum(math.comb(m + 1, j) * (-bernoulli(j) if j == 1 else bernoulli(j)) for j in range(m))
+    return -total / (m + 1)
+
+
+@functools.lru_cache(maxsize=None)
+def power_sum_polynomial(k: int):
+
+    '''
+    Faulhaber's formula for 1**k + 2**k + ... + n**k as integer
+    coefficients (highest power of n first) and one common
+    denominator, so evaluating it is integer math only:
+
+    power_sum(k, n) == horner(coefficients, n) // denominator
+    '''
+
+    if k < 0:
+        raise ValueError("power must be >= 0")
+    # Coefficient of n**(k+1-j) is C(k+1, j) * B_j / (k+1)
+    fractions = [Fraction(math.comb(k + 1, j)) * bernoulli(j) / (k + 1) for j in range(k + 1)] + [Fraction(0)]
+    denominator = math.lcm(*(f.denominator for f in fractions))
+    return tuple(int(f * denominator) for f in fractions), denominator
+
+
+def power_sum(k: int, n: int):
+
+    '''
+    The general version of sumsquares(): exact sum of the k-th powers
+    of 1 to n, in time that doesn't depend on n.
+
+    power_sum(2, 5) == 55    (1 + 4 + 9 + 16 + 25)
+
+    The polynomial also holds for n <= 0, which range_power_sum()
+    relies on (power_sum(k, n) - power_sum(k, n-1) == n**k for any n).
+    '''
+
+    coefficients, denominator = power_sum_polynomial(k)
+    total = 0
+    for c in coefficients:
+        total = total * n + c
+    return total // denominator
+
+
+def range_power_sum(k: int, lo: int, hi: int):
+
+    '''
+    Exact sum of i**k for every integer i from lo to hi inclusive
+    (0 when hi < lo). Negative bounds are fine, and 0**0 counts as 1
+    like in Python.
+    '''
+
+    if hi < lo:
+        return 0
+    return power_sum(k, hi) - power_sum(k, lo - 1)
+
+
+def range_power_sums(k: int, ranges: Iterable[tuple[int, int]]):
+
+    '''
+    range_power_sum() for every (lo, hi) pair of a batch, sharing one
+    cached polynomial, so each range costs O(k) integer operations
+    however long it is.
+    '''
+
+    return [range_power_sum(k, lo, hi) for lo, hi in ranges]
+
+
+def even_power_sum(k: int, n: int):
+
+    '''
+    The general version of sumeven(): sum of the k-th powers of the
+    first n even numbers (0, 2, 4, ...), i.e. 2**k times the powers
+    of 0 to n-1.
+    '''
+
+    return 2**k * range_power_sum(k, 0, n - 1)
+
+
+def odd_power_sum(k: int, n: int):
+
+    '''
+    Sum of the k-th powers of the first n odd numbers (1, 3, 5, ...):
+    everything up to 2n minus the evens 2, 4, ..., 2n.
+    '''
+
+    if n <= 0:
+        return 0
+    return power_sum(k, 2 * n) - 2**k * power_sum(k, n)
+
+
+# --------------------------------------------------------------
+# 9) Digits of Huge Numbers
+# --------------------------------------------------------------
+# Numbers below 10**DIGIT_LEAF are converted with str() directly
+# (well under the int -> str digit limit of Python 3.11+)
+DIGIT_LEAF = 1024
+
+@functools.lru_cache(maxsize=None)
+def _power_of_ten(level: int):
+
+    '''
+    10 ** (DIGIT_LEAF * 2**level), each one squared from the last
+    '''
+
+    if level == 0:
+        return 10 ** DIGIT_LEAF
+    return _power_of_ten(level - 1) ** 2
+
+
+def decimal_digits(num: int):
+
+    '''
+    Decimal digits of a non-negative integer of any size, without
+    the sign. str() on a huge int is quadratic (and refused past
+    4300 digits on newer Pythons), so the number is split in halves
+    by cached powers of ten until the pieces are small, and each
+    lower half is zero-padded to its exact width.
+    '''
+
+    num = abs(num)
+    if num < _power_of_ten(0):
+        return str(num)
+
+    level = 0
+    while _power_of_ten(level + 1) <= num:
+        level += 1
+
+    def convert(n: int, level: int, pad: bool):
+        width = DIGIT_LEAF * 2**level
+        if level < 0:
+            text = str(n)
+            return text.zfill(DIGIT_LEAF) if pad else text
+        high, low = divmod(n, _power_of_ten(level))
+        if not high and not pad:
+            return convert(low, level - 1, False)
+        return convert(high, level - 1, pad) + convert(low, level - 1, True).zfill(width)
+
+    return convert(num, level, False)
+
+
+def _digit_text(num: int | str | bytes):
+    if isinstance(num, int):
+        return decimal_digits(num)
+    return num.decode("ascii") if isinstance(num, bytes) else num
+
+
+def digit_histogram(num: int | str | bytes):
+
+    '''
+    How many times each digit 0-9 appears in a number. The number
+    can also be given as a decimal string or bytes (e.g. read from
+    a file), which skips the conversion; anything that isn't a
+    digit in it (sign, spaces, newlines) is ignored.
+    '''
+
+    if isinstance(num, bytes):
+        return [num.count(digit) for digit in DIGITS.encode()]
+    text = _digit_text(num)
+    return [text.count(digit) for digit in DIGITS]
+
+
+def digit_sums(num: int | str | bytes):
+
+    '''
+    The general version of odddigitsum(): (sum of the even digits,
+    sum of the odd digits) of a number or decimal string, from its
+    digit histogram.
+    '''
+
+    counts = digit_histogram(num)
+    return sum(d * counts[d] for d in range(0, 10, 2)), sum(d * counts[d] for d in range(1, 10, 2))
+
+
+def filter_digits(num: int | str | bytes, keep: str = "13579"):
+
+    '''
+    Only the characters of 'num' that are in 'keep', in order, using one
+    str.translate pass. filter_digits(482376) == '37'
+    '''
+
+    text = _digit_text(num)
+    # Drop every character that occurs and is not kept, whatever it is
+    drop = str.maketrans("", "", "".join(set(text) - set(keep)))
+    return text.translate(drop)
+
+
+# --------------------------------------------------------------
+# 10) Streaming Exponentials
+# --------------------------------------------------------------
+def exponentials(base: int | float, n: int | None = None, mod: int | None = None) -> Iterator[int | float]:
+
+    '''
+    Lazy version of listexponential(): yields base**0, base**1, ...
+    (n of them, or forever when n is None). Integer powers are built
+    by multiplying the last one by the base instead of recomputing
+    each from scratch. With 'mod', every power is reduced mod 'mod'
+    as it is built, so the values stay small however long it runs.
+
+    Float bases use base**x for each step, so the values are exactly
+    the ones pow() gives rather than accumulating rounding errors.
+    '''
+
+    if mod is not None:
+        if not isinstance(base, int) or mod < 1:
+            raise ValueError("mod needs an integer base and a positive modulus")
+    exponents = range(n) if n is not None else itertools.count()
+
+    if isinstance(base, float):
+        for x in exponents:
+            yield base**x
+        return
+
+    value = 1 if mod is None else 1 % mod
+    for _ in exponents:
+        yield value
+        value = value * base if mod is None else value * base % mod
+
+
+def exponential_array(n: int, base: int | float, mod: int | None = None):
+
+    '''
+    The first n powers of 'base' packed in an array: signed 64-bit
+    ('q') for integers and doubles ('d') for floats, 8 bytes each
+    instead of a list of Python objects. Raises OverflowError when
+    the integers don't fit in 64 bits (use mod= or exponentials()).
+    '''
+
+    if isinstance(base, float):
+        return array('d', exponentials(base, n))
+    if mod is not None:
+        too_big = mod > 2**63
+    else:
+        # Check the bit length first so a huge power is never computed
+        too_big = abs(base) > 1 and ((n - 1) * (abs(base).bit_length() - 1) >= 63 or abs(base) ** (n - 1) >= 2**63)
+    if too_big:
+        raise OverflowError("powers don't fit in 64 bits")
+    return array('q', exponentials(base, n, mod))
+
+
+# --------------------------------------------------------------
+# 11) Numbers from Huge Text
+# --------------------------------------------------------------
+# Works on bytes: float() takes them directly, so nothing is decoded
+NUMBER = re.compile(rb"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+# Looser runs of number bytes, much cheaper to scan for than NUMBER.
+# Almost all of them are a whole number float() accepts as is.
+CANDIDATE = re.compile(rb"[-+.0-9][-+.0-9eE]*")
+NON_DIGITS = re.compile(rb"[^0-9]+")
+# Every byte that can be part of a number token
+NUMBER_BYTES = b"0123456789+-.eE"
+
+def read_blocks(stream: BinaryIO, chunk_size: int = 1 << 20, end: int | None = None) -> Iterator[bytes]:
+
+    '''
+    Read a binary file in chunks, up to byte offset 'end' if given
+    '''
+
+    while True:
+        size = chunk_size if end is None else min(chunk_size, end - stream.tell())
+        block = stream.read(size) if size > 0 else b""
+        if not block:
+            return
+        yield block
+
+
+def number_chunks(blocks: Iterable[bytes]) -> Iterator[bytes]:
+
+    '''
+    Re-cut blocks of text so no number is split between two of them:
+    the bytes at the end of a block that could still be part of a
+    number (digits, sign, point, exponent) are held back and put in
+    front of the next block.
+    '''
+
+    carry = b""
+    for block in blocks:
+        block = carry + block
+        cut = len(block.rstrip(NUMBER_BYTES))
+        carry = block[cut:]
+        if cut:
+            yield block[:cut]
+    if carry:
+        yield carry
 
-        if isinstance(x, float):
-            largest[1] = x if largest[1] < x else largest[1]
 
-        if isinstance(x, str):
-            largest[2] = x if largest[2] < x else largest[2]
+def parse_numbers(chunk: bytes):
 
-    # Check for changed values
-    largest = [None if v == clone[i] else v for i,v in enumerate(largest)]
+    '''
+    Every number in a chunk of text, as floats
+    '''
+
+    values = []
+    for token in CANDIDATE.findall(chunk):
+        try:
+            values.append(float(token))
+        except ValueError:
+            # e.g. "5-3" or "1.2.3", fall back to the exact pattern
+            values.extend(map(float, NUMBER.findall(token)))
+    return values
+
+
+def iter_numbers(stream: BinaryIO, chunk_size: int = 1 << 20) -> Iterator[float]:
+
+    '''
+    Streaming version of stringtofloatlist() for files of any size:
+    yields every number in a binary stream (ints, decimals, signs and
+    exponents such as -1.5e3) as a float, reading 'chunk_size' bytes
+    at a time.
+    '''
+
+    for chunk in number_chunks(read_blocks(stream, chunk_size)):
+        yield from parse_numbers(chunk)
+
+
+def iter_digits(stream: BinaryIO, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+
+    '''
+    Streaming version of digitcat(): the ASCII digits of a binary
+    stream, one run of bytes per chunk read (single characters can't
+    be split, so no boundary handling is needed).
+    '''
+
+    for block in read_blocks(stream, chunk_size):
+        digits = NON_DIGITS.sub(b"", block)
+        if digits:
+            yield digits
+
+
+def _numbers_between(path: str, start: int, end: int, chunk_size: int):
+    with open(path, 'rb') as stream:
+        stream.seek(start)
+        values = array('d')
+        for chunk in number_chunks(read_blocks(stream, chunk_size, end)):
+            values.extend(parse_numbers(chunk))
+    return values
+
+
+def split_points(path: str, parts: int):
+
+    '''
+    Byte offsets cutting a file into about 'parts' equal pieces, each
+    moved forward past any number it would land in.
+    '''
+
+    size = os.path.getsize(path)
+    points = [0]
+    with open(path, 'rb') as stream:
+        for i in range(1, parts):
+            pos = max(size * i // parts, points[-1])
+            stream.seek(pos)
+            while block := stream.read(4096):
+                kept = len(block) - len(block.lstrip(NUMBER_BYTES))
+                pos += kept
+                if kept < len(block):
+                    break
+            points.append(min(pos, size))
+    points.append(size)
+    return points
+
+
+def read_numbers(path: str, chunk_size: int = 1 << 20, workers: int = 1):
+
+    '''
+    Every number of a file packed in an array('d') (8 bytes each, and
+    memoryview(result) gives zero-copy access to them). With more
+    than one worker the file is cut at split_points() and the pieces
+    are parsed in separate processes.
+    '''
+
+    if workers <= 1:
+        return _numbers_between(path, 0, os.path.getsize(path), chunk_size)
+
+    points = split_points(path, workers)
+    values = array('d')
+    with ProcessPoolExecutor(workers) as pool:
+        for part in pool.map(_numbers_between, itertools.repeat(path), points, points[1:], itertools.repeat(chunk_size)):
+            values.extend(part)
+    return values
+
+
+# --------------------------------------------------------------
+# 12) Statistics of Each Type
+# --------------------------------------------------------------
+class TypeAggregator:
+
+    '''
+    The general version of maxbytype(): count, min, max and (for
+    numbers) sum of the values of each type in a mixed stream.
+
+    Values are dispatched on their exact type with one dict lookup
+    (so True counts as a bool, not an int). A type that never shows
+    up has no entry, instead of a made-up default that could be
+    mistaken for a real value. Pass 'types' to only keep some types.
+
+    Aggregators of separate chunks (or processes, they pickle) are
+    combined with merge(), giving the same result as one pass.
+    NaN is counted (and poisons the sum) but never becomes the min or
+    max, since it compares false with everything.
+    '''
+
+    def __init__(self, types: Iterable[type] | None = None) -> None:
+        self.types = None if types is None else frozenset(types)
+        # type -> [count, min, max, sum], min/max are None until an ordered
+        # value shows up and sum is None for non-numbers
+        self.stats: dict[type, list[Any]] = {}
+        # Types that can't be ordered at all (None, dict, complex...)
+        self.unordered: set[type] = set()
+
+    def add(self, value: Any) -> None:
+        '''
+        Count one value
+        '''
+        self.update((value,))
+
+    def update(self, values: Iterable[Any]) -> None:
+        '''
+        Count every value of an iterable
+        '''
+        stats = self.stats
+        types = self.types
+        unordered = self.unordered
+        for value in values:
+            kind = type(value)
+            entry = stats.get(kind)
+            if entry is None:
+                if types is not None and kind not in types:
+                    continue
+                try:
+                    # Only checks that the type supports < at all
+                    value < value
+                except TypeError:
+                    unordered.add(kind)
+                entry = stats[kind] = [1, None, None, value if issubclass(kind, numbers.Number) else None]
+            else:
+                entry[0] += 1
+                if entry[3] is not None:
+                    entry[3] += value
+            # value != value only for NaN
+            if kind in unordered or value != value:
+                continue
+            if entry[1] is None:
+                entry[1] = entry[2] = value
+            elif value < entry[1]:
+                entry[1] = value
+            elif value > entry[2]:
+                entry[2] = value
+
+    def merge(self, other: "TypeAggregator") -> "TypeAggregator":
+        '''
+        Fold the counts of another aggregator into this one and return it
+        '''
+        for kind, (count, low, high, total) in other.stats.items():
+            if self.types is not None and kind not in self.types:
+                continue
+            if kind in other.unordered:
+                self.unordered.add(kind)
+            entry = self.stats.get(kind)
+            if entry is None:
+                self.stats[kind] = [count, low, high, total]
+                continue
+            entry[0] += count
+            if low is not None:
+                entry[1] = low if entry[1] is None else min(entry[1], low)
+                entry[2] = high if entry[2] is None else max(entry[2], high)
+            if entry[3] is not None:
+                entry[3] += total
+        return self
+
+    def count(self, kind: type) -> int:
+        '''
+        Number of values of a type
+        '''
+        return self.stats[kind][0] if kind in self.stats else 0
+
+    def min(self, kind: type) -> Any:
+        '''
+        Smallest value of a type, None if there were none (or it has no order)
+        '''
+        return self.stats[kind][1] if kind in self.stats else None
+
+    def max(self, kind: type) -> Any:
+        '''
+        Largest value of a type, None if there were none (or it has no order)
+        '''
+        return self.stats[kind][2] if kind in self.stats else None
+
+    def sum(self, kind: type) -> Any:
+        '''
+        Sum of the values of a numeric type, None if there were none
+        '''
+        return self.stats[kind][3] if kind in self.stats else None
+
+    def summary(self) -> dict[type, dict[str, Any]]:
+        '''
+        Every statistic of every type seen
+        '''
+        return {
+            kind: {"count": count, "min": low, "max": high, "sum": total}
+            for kind, (count, low, high, total) in self.stats.items()
+        }
+
+
+def aggregate(values: Iterable[Any], types: Iterable[type] | None = None):
+
+    '''
+    TypeAggregator over 'values' in one pass, e.g. one chunk of a
+    larger stream to merge() with the others.
+    '''
 
-    return tuple(largest)
+    stats = TypeAggregator(types)
+    stats.update(values)
+    return stats
@@ -1,4 +1,9 @@
 #!/usr/bin/python3
+import io
+import math
+import os
+import sys
+import tempfile
 import unittest
 import lab4_funcs
 
@@ -22,6 +27,29 @@ class TestLab4(unittest.TestCase):
         self.assertEqual(lab4_funcs.sumsquares(0), 0)  # No squares to sum
     def test_sum_squares_large_input(self):
         self.assertEqual(lab4_funcs.sumsquares(10000), 333383335000)  # Sum of squares up to 10000
+    def test_sum_squares_exact(self):
+        self.assertEqual(lab4_funcs.sumsquares(10**20), 10**20 * (10**20 + 1) * (2 * 10**20 + 1) // 6)  # Too big for a float
+
+
+    def test_power_sum_small(self):
+        for k in range(8):
+            for n in range(12):
+                self.assertEqual(lab4_funcs.power_sum(k, n), sum(i**k for i in range(1, n + 1)))
+    def test_power_sum_cubes(self):
+        self.assertEqual(lab4_funcs.power_sum(3, 10**15), (10**15 * (10**15 + 1) // 2) ** 2)  # Nicomachus
+    def test_range_power_sum(self):
+        for lo, hi in [(-5, 7), (0, 0), (3, 9), (-8, -2), (5, 4)]:
+            for k in range(5):
+                self.assertEqual(lab4_funcs.range_power_sum(k, lo, hi), sum(i**k for i in range(lo, hi + 1)))
+    def test_range_power_sums(self):
+        self.assertEqual(lab4_funcs.range_power_sums(1, [(1, 100), (10**12, 10**12 + 1), (4, 3)]), [5050, 2 * 10**12 + 1, 0])
+    def test_even_and_odd_power_sum(self):
+        for k in range(5):
+            for n in range(8):
+                self.assertEqual(lab4_funcs.even_power_sum(k, n), sum((2 * i)**k for i in range(n)))
+                self.assertEqual(lab4_funcs.odd_power_sum(k, n), sum((2 * i + 1)**k for i in range(n)))
+    def test_power_sum_negative_power(self):
+        self.assertRaises(ValueError, lab4_funcs.power_sum, -1, 5)
 
 
     def test_odddigitsum_positive_integer(self):
@@ -40,6 +68,34 @@ class TestLab4(unittest.TestCase):
         self.assertEqual(lab4_funcs.odddigitsum(4), 0)  # Single even digit
     def test_odddigitsum_large_input(self):
         self.assertEqual(lab4_funcs.odddigitsum(123456789123456789123456789), 75)  # Sum of all odd digits
+    def test_odddigitsum_huge_input(self):
+        self.assertEqual(lab4_funcs.odddigitsum(10**5000 - 1), 45000)  # Past the int -> str digit limit
+
+
+    def test_decimal_digits(self):
+        limit = sys.get_int_max_str_digits()
+        sys.set_int_max_str_digits(0)
+        try:
+            for num in [0, 7, 10**1024 - 1, 10**1024, 10**5000, 3**20000, 10**3000 + 7]:
+                self.assertEqual(lab4_funcs.decimal_digits(num), str(num))
+        finally:
+            sys.set_int_max_str_digits(limit)
+        self.assertEqual(lab4_funcs.decimal_digits(-10**5000), "1" + "0" * 5000)  # Works under the digit limit too
+    def test_digit_histogram(self):
+        self.assertEqual(lab4_funcs.digit_histogram(-1000), [3, 1, 0, 0, 0, 0, 0, 0, 0, 0])
+        self.assertEqual(lab4_funcs.digit_histogram("482376\n"), [0, 0, 1, 1, 1, 0, 1, 1, 1, 0])
+        self.assertEqual(lab4_funcs.digit_histogram(b"99 1"), [0, 1, 0, 0, 0, 0, 0, 0, 0, 2])
+    def test_digit_sums(self):
+        self.assertEqual(lab4_funcs.digit_sums(482376), (20, 10))
+        self.assertEqual(lab4_funcs.digit_sums(b"13579"), (0, 25))
+        self.assertEqual(lab4_funcs.digit_sums(10**4000 * 3), (0, 3))
+    def test_filter_digits(self):
+        self.assertEqual(lab4_funcs.filter_digits(482376), "37")
+        self.assertEqual(lab4_funcs.filter_digits("-482376", keep="02468"), "4826")
+        self.assertEqual(lab4_funcs.filter_digits(b"2468"), "")
+        self.assertEqual(lab4_funcs.filter_digits("3.14"), "31") # '.' is not kept
+        self.assertEqual(lab4_funcs.filter_digits("12 34\n"), "13")
+        self.assertEqual(lab4_funcs.filter_digits("3.14", keep=""), "")
 
 
     def test_listexponential_positive_exponents(self):
@@ -56,6 +112,25 @@ class TestLab4(unittest.TestCase):
         self.assertEqual(lab4_funcs.listexponential(4, -0.5), [1, -0.5, 0.25, -0.125])
     def test_listexponential_zero_base(self):
         self.assertEqual(lab4_funcs.listexponential(5, 0), [1, 0, 0, 0, 0])  # Any number to the power of 0 is 1
+    def test_listexponential_float_precision(self):
+        self.assertEqual(lab4_funcs.listexponential(50, 1.1), [1.1**x for x in range(50)])
+
+
+    def test_exponentials_lazy(self):
+        powers = lab4_funcs.exponentials(3)
+        self.assertEqual([next(powers) for _ in range(5)], [1, 3, 9, 27, 81])  # Runs forever without n
+    def test_exponentials_mod(self):
+        self.assertEqual(list(lab4_funcs.exponentials(7, 200, mod=1000)), [pow(7, x, 1000) for x in range(200)])
+        self.assertEqual(list(lab4_funcs.exponentials(5, 3, mod=1)), [0, 0, 0])
+        self.assertRaises(ValueError, list, lab4_funcs.exponentials(2.5, 3, mod=7))
+        self.assertRaises(ValueError, list, lab4_funcs.exponentials(2, 3, mod=0))
+    def test_exponential_array(self):
+        self.assertEqual(lab4_funcs.exponential_array(5, 2).typecode, 'q')
+        self.assertEqual(lab4_funcs.exponential_array(5, 2).tolist(), [1, 2, 4, 8, 16])
+        self.assertEqual(lab4_funcs.exponential_array(3, 0.5).tolist(), [1.0, 0.5, 0.25])
+        self.assertEqual(lab4_funcs.exponential_array(10**5, 3, mod=10**9 + 7)[-1], pow(3, 10**5 - 1, 10**9 + 7))
+        self.assertEqual(lab4_funcs.exponential_array(0, 2).tolist(), [])
+        self.assertRaises(OverflowError, lab4_funcs.exponential_array, 64, 2)
 
 
     def test_digitcat_digits_only(self):
@@ -92,6 +167,29 @@ class TestLab4(unittest.TestCase):
         self.assertEqual(lab4_funcs.stringtofloatlist("1.0,2.5,-3.0,4.2"), [1.0, 2.5, -3.0, 4.2])
 
 
+    LOG = b"t=12.5s id 40017 temp -3.25e2 ok, .5 x9 1e-3\nrelease 2.0 -7 +8.\n"
+    LOG_NUMBERS = [12.5, 40017.0, -325.0, 0.5, 9.0, 0.001, 2.0, -7.0, 8.0]
+    def test_iter_numbers(self):
+        for size in range(1, len(self.LOG) + 1):  # Every possible chunk boundary
+            self.assertEqual(list(lab4_funcs.iter_numbers(io.BytesIO(self.LOG), size)), self.LOG_NUMBERS)
+    def test_parse_numbers_odd_tokens(self):
+        self.assertEqual(lab4_funcs.parse_numbers(b"5-3 1.2.3 e5 1e -. 7e+1 +-4"), [5.0, -3.0, 1.2, 0.3, 5.0, 1.0, 70.0, -4.0])
+    def test_iter_numbers_csv(self):
+        self.assertEqual(list(lab4_funcs.iter_numbers(io.BytesIO(b"1.0,2.5,-3.0,4.2"), 3)), [1.0, 2.5, -3.0, 4.2])
+    def test_iter_digits(self):
+        self.assertEqual(b"".join(lab4_funcs.iter_digits(io.BytesIO(b"abc-123def 3.14"), 4)), b"123314")
+        self.assertEqual(list(lab4_funcs.iter_digits(io.BytesIO(b"abcxyz"))), [])
+    def test_read_numbers(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "log.txt")
+            with open(path, 'wb') as file:
+                file.write(self.LOG * 50)
+            self.assertEqual(lab4_funcs.read_numbers(path, 7).tolist(), self.LOG_NUMBERS * 50)
+            self.assertEqual(lab4_funcs.read_numbers(path, 7, workers=3).tolist(), self.LOG_NUMBERS * 50)
+            points = lab4_funcs.split_points(path, 16)
+            self.assertEqual(points, sorted(points))
+
+
     def test_maxbytype_all_integer(self):
         self.assertEqual(lab4_funcs.maxbytype([3, 1, 4, 2]), (4, None, None))
     def test_maxbytype_all_float(self):
@@ -110,6 +208,47 @@ class TestLab4(unittest.TestCase):
     def test_maxbytype_large_input(self):
         large_input = list(range(1000000)) + [None] + ['apple', 'banana', 'cherry']
         self.assertEqual(lab4_funcs.maxbytype(large_input), (999999, None, 'cherry'))
+    def test_maxbytype_negative_values(self):
+        self.assertEqual(lab4_funcs.maxbytype([-3, -1, -2.5, -0.5]), (-1, -0.5, None))  # No 0 / 0.0 defaults
+    def test_maxbytype_empty_string(self):
+        self.assertEqual(lab4_funcs.maxbytype(['', 0, 0.0]), (0, 0.0, ''))
+
+
+    def test_aggregate(self):
+        stats = lab4_funcs.aggregate([3, -7, 2.5, 'b', 'a', True, None, -1.5, 10])
+        self.assertEqual(stats.summary()[int], {"count": 3, "min": -7, "max": 10, "sum": 6})
+        self.assertEqual(stats.summary()[float], {"count": 2, "min": -1.5, "max": 2.5, "sum": 1.0})
+        self.assertEqual(stats.summary()[str], {"count": 2, "min": 'a', "max": 'b', "sum": None})
+        self.assertEqual(stats.count(bool), 1)
+        self.assertEqual(stats.count(type(None)), 1)
+        self.assertEqual(stats.count(bytes), 0)
+        self.assertIsNone(stats.max(bytes))
+    def test_aggregate_unordered(self):
+        stats = lab4_funcs.aggregate([None, None, {}, {'a': 1}, 1j, 2j])
+        self.assertEqual(stats.summary()[type(None)], {"count": 2, "min": None, "max": None, "sum": None})
+        self.assertEqual(stats.count(dict), 2)
+        self.assertEqual(stats.sum(complex), 3j)
+        self.assertIsNone(stats.max(complex))
+    def test_aggregate_nan(self):
+        nan = float("nan")
+        for values in ([nan, 2.0, -1.0], [2.0, nan, -1.0], [2.0, -1.0, nan]):
+            stats = lab4_funcs.aggregate(values)
+            self.assertEqual((stats.count(float), stats.min(float), stats.max(float)), (3, -1.0, 2.0))
+            self.assertTrue(math.isnan(stats.sum(float)))  # NaN still poisons the sum
+        merged = lab4_funcs.aggregate([nan]).merge(lab4_funcs.aggregate([1.5]))
+        self.assertEqual((merged.count(float), merged.min(float), merged.max(float)), (2, 1.5, 1.5))
+        self.assertIsNone(lab4_funcs.aggregate([nan]).min(float))
+    def test_aggregate_types(self):
+        stats = lab4_funcs.aggregate([1, 'a', 2.0], types=[str])
+        self.assertEqual(list(stats.summary()), [str])
+    def test_aggregate_merge(self):
+        values = [5, 'x', -2.0, 9, 'q', 3.5, -4, 'z', 0] * 3
+        whole = lab4_funcs.aggregate(values).summary()
+        parts = [lab4_funcs.aggregate(values[i:i + 4]) for i in range(0, len(values), 4)]
+        merged = lab4_funcs.TypeAggregator()
+        for part in parts:
+            merged.merge(part)
+        self.assertEqual(merged.summary(), whole)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,260 @@
+'''
+    Author: Andrii Naumenko
+    Description: Benchmarks for the Financer cli (cps109_a1.py)
+
+    Run from this directory:
+        py bench_financer.py commands [--count N] [--log FILE]
+        py bench_financer.py storage [--sizes 10000,100000] [--logins N] [--json FILE]
+        py bench_financer.py generate DIR [--items N] [--logins N]
+'''
+# pylint: disable=C0301:line-too-long
+
+import argparse
+import contextlib
+from datetime import date
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+import cps109_a1 as financer
+
+TYPES = ["expense", "income"]
+CATEGORIES = ["food", "rent", "savings", "school", "transit", "fun stuff", "gifts", "health"]
+
+def generate_command_log(count: int, seed: int = 109) -> list[str]:
+    '''
+    Build a synthetic command log that looks like recorded batch input.
+
+    :param count: Number of commands
+    :type count: int
+    :param seed: Random seed so runs are comparable
+    :type seed: int
+    :returns: List of command lines
+    '''
+    rng = random.Random(seed)
+    log: list[str] = []
+    for _ in range(count):
+        roll = rng.random()
+        category = rng.choice(CATEGORIES)
+        quoted = f'"{category}"' if " " in category else category
+        if roll < 0.9:
+            log.append(f"budget add {rng.choice(TYPES)} {quoted} {rng.randint(1, 5000)}.{rng.randint(0, 99):02}")
+        elif roll < 0.98:
+            log.append(f"category add {quoted}")
+        else:
+            log.append("category list")
+    return log
+
+def generate_ledger(path: str, username: str, password: str, count: int, categories: int = 50, seed: int = 109) -> None:
+    '''
+    Write a synthetic data-<user>.txt with count budget items spread over
+    a few years and many categories. Lines are streamed, so 10M items
+    don't need to fit in memory.
+
+    :param path: Data file to write
+    :type path: String
+    :param count: Number of budget items
+    :type count: int
+    :param categories: Number of distinct categories
+    :type categories: int
+    '''
+    rng = random.Random(seed)
+    names = [f"category-{i}" for i in range(categories)]
+    first_day = date(2020, 1, 1).toordinal()
+    with open(path, 'w', encoding="utf-8") as file:
+        file.write(f"{username},{password}\n---Budget\n")
+        for _ in range(count):
+            day = date.fromordinal(first_day + rng.randrange(2000))
+            file.write(f"{day},{rng.choice(TYPES)},{rng.choice(names)},{rng.randint(1, 500000) / 100:.2f}\n")
+        file.write("---Categories\n")
+        file.writelines(f"{name}\n" for name in names)
+        file.write("---Goals\nsave,10000.00,2020-01-01,2030-01-01\nlimit,category-0,500.00\n")
+
+def generate_logins(path: str, count: int, last: tuple[str, str] | None = None) -> None:
+    '''
+    Write a logins.txt with count filler accounts. The optional last
+    login goes at the end so lookups of it scan the whole file.
+    '''
+    with open(path, 'w', encoding="utf-8") as file:
+        for i in range(count):
+            file.write(f"user{i},password{i}\n")
+        if last:
+            file.write(f"{last[0]},{last[1]}\n")
+
+def measure(func: Callable[[], Any], memory: bool = True, cleanup: Callable[[Any], Any] | None = None) -> tuple[float, int, Any]:
+    '''
+    Run func once for latency, then again under tracemalloc for peak memory
+    (tracing slows Python down, so the two are kept apart).
+    cleanup runs on each result outside of the measurements.
+
+    :returns: Tuple of (seconds, peak bytes or -1, result of the timed run)
+    '''
+    with open(os.devnull, 'w', encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        if cleanup:
+            cleanup(result)
+
+        peak = -1
+        if memory:
+            tracemalloc.start()
+            extra = func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            if cleanup:
+                cleanup(extra)
+    return elapsed, peak, result
+
+def bench_storage(sizes: list[int], logins: int, memory: bool = True) -> list[dict[str, Any]]:
+    '''
+    Latency and peak memory of loading/saving ledgers of each size and of
+    login lookups against a logins.txt with the given number of accounts.
+
+    :param sizes: Ledger sizes to test
+    :type sizes: list[int]
+    :param logins: Number of accounts in logins.txt
+    :type logins: int
+    :param memory: Also measure peak memory
+    :type memory: bool
+    :returns: One result dict per (operation, size)
+    '''
+    results: list[dict[str, Any]] = []
+
+    def record(operation: str, size: int, func: Callable[[], Any], cleanup: Callable[[Any], Any] | None = None) -> Any:
+        seconds, peak, result = measure(func, memory, cleanup)
+        results.append({"operation": operation, "size": size, "seconds": seconds, "peak_bytes": peak})
+        memory_col = f"{peak / 2**20:>8.1f} MiB" if peak >= 0 else ""
+        print(f"{operation:<28} {size:>10,}  {seconds * 1000:>10.1f} ms  {memory_col}", file=sys.stderr)
+        return result
+
+    def logout(user: Any) -> None:
+        user.close()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            generate_logins(financer.LOGIN_FILE, logins, ("bench", "bench"))
+            record("try_login", logins, lambda: financer.try_login("bench", "bench"))
+            counter = iter(range(sys.maxsize))
+            record("new_login", logins, lambda: financer.new_login(f"new{next(counter)}", "pw"))
+
+            for size in sizes:
+                generate_ledger(financer.DATA_FILE_PREFIX + "bench.txt", "bench", "bench", size)
+                user = record("User.__init__", size, lambda: financer.User("bench", "bench"), logout)
+                record("save_data", size, user.save_data)
+
+                user.snapshot = True
+                record("save_data (snapshot)", size, user.save_data)
+                record("User.__init__ (snapshot)", size, lambda: financer.User("bench", "bench", snapshot=True), logout)
+                os.remove(financer.snapshot_path("bench"))
+        finally:
+            os.chdir(cwd)
+    return results
+
+@contextlib.contextmanager
+def scratch_user(username: str = "bench", password: str = "bench"):
+    '''
+    Create a throwaway account in a temporary directory and yield the logged in User
+    '''
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with open(os.devnull, 'w', encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                financer.new_login(username, password)
+                financer.new_data(username, password)
+                user = financer.User(username, password)
+            yield user
+            with open(os.devnull, 'w', encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+                user.close()
+        finally:
+            os.chdir(cwd)
+
+def bench_commands(log: list[str]) -> dict[str, float]:
+    '''
+    Time tokenizing + resolving every command, then replaying the log against a scratch user.
+
+    :param log: Command lines to replay
+    :type log: list[str]
+    :returns: Commands per second for each phase
+    '''
+    start = time.perf_counter()
+    for line in log:
+        action, *modifiers = financer.tokenize(line)
+        financer.COMMANDS.get((action, modifiers[0] if modifiers else "help"))
+    parse_time = time.perf_counter() - start
+
+    with scratch_user() as user:
+        with open(os.devnull, 'w', encoding="utf-8") as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            for line in log:
+                user.command(line)
+            replay_time = time.perf_counter() - start
+
+    return {
+        "commands": len(log),
+        "parse_per_sec": len(log) / parse_time,
+        "replay_per_sec": len(log) / replay_time,
+    }
+
+def main() -> None:
+    '''Main entry'''
+    parser = argparse.ArgumentParser(description="Financer benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    cmd_parser = sub.add_parser("commands", help="command tokenizer and dispatch")
+    cmd_parser.add_argument("--count", type=int, default=100_000, help="synthetic commands to generate")
+    cmd_parser.add_argument("--log", help="replay a recorded command log instead")
+
+    storage_parser = sub.add_parser("storage", help="load/save and login latency and peak memory")
+    storage_parser.add_argument("--sizes", default="10000,100000", help="comma separated ledger sizes")
+    storage_parser.add_argument("--logins", type=int, default=100_000, help="accounts in the generated logins.txt")
+    storage_parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc runs")
+    storage_parser.add_argument("--json", help="write results as JSON to this file (\"-\" for stdout)")
+
+    gen_parser = sub.add_parser("generate", help="write synthetic data-bench.txt and logins.txt")
+    gen_parser.add_argument("directory")
+    gen_parser.add_argument("--items", type=int, default=100_000)
+    gen_parser.add_argument("--categories", type=int, default=50)
+    gen_parser.add_argument("--logins", type=int, default=1000)
+
+    args = parser.parse_args()
+    match args.bench:
+        case "commands":
+            if args.log:
+                with open(args.log, 'r', encoding="utf-8") as file:
+                    log = [line.rstrip("\n") for line in file if line.strip()]
+            else:
+                log = generate_command_log(args.count)
+            result = bench_commands(log)
+            print(f"{result["commands"]} commands: parse {result["parse_per_sec"]:,.0f}/s, replay {result["replay_per_sec"]:,.0f}/s")
+        case "storage":
+            sizes = [int(size) for size in args.sizes.split(",")]
+            output = {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "results": bench_storage(sizes, args.logins, not args.no_memory),
+            }
+            if args.json == "-":
+                print(json.dumps(output, indent=2))
+            elif args.json:
+                with open(args.json, 'w', encoding="utf-8") as file:
+                    json.dump(output, file, indent=2)
+        case "generate":
+            os.makedirs(args.directory, exist_ok=True)
+            generate_ledger(os.path.join(args.directory, financer.DATA_FILE_PREFIX + "bench.txt"), "bench", "bench", args.items, args.categories)
+            generate_logins(os.path.join(args.directory, financer.LOGIN_FILE), args.logins, ("bench", "bench"))
+        case _:
+            pass
+
+if __name__ == "__main__":
+    main()
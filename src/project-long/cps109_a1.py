@@ -8,21 +8,74 @@
 # pylint: disable=C0301:line-too-long
 # pyright: ignore[reportPossiblyUnboundVariable]
 
-from datetime import date, timedelta
+from abc import ABC, abstractmethod
+import argparse
+import atexit
+import bisect
+import calendar
+import contextlib
+from collections import Counter, OrderedDict
+import csv
+from datetime import date, datetime, timedelta
 from enum import Enum
 import functools
-from typing import Any, Callable
+import heapq
+import io
+import itertools
+import mmap
+import os
+import re
+import signal
+import socketserver
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from typing import Any, Callable, IO, Iterable, Iterator
+
+try:
+    import fcntl
+except ImportError: # Windows, per-user file locks are skipped
+    fcntl = None
 
 TODAY = date.today()
 TOMORROW = date.today() + timedelta(days=1)
 
 LOGIN_FILE = "logins.txt"
 DATA_FILE_PREFIX = "data-"
+SNAPSHOT_SUFFIX = ".snap"
+LOCK_SUFFIX = ".lock"
+DATABASE_FILE = "financer.db"
+RATES_FILE = "rates.txt"
+
+# Currency reports are converted to, items without a currency code are in it
+BASE_CURRENCY = "CAD"
+# Exchange rates are kept as integers scaled by this (6 decimal places)
+RATE_SCALE = 1_000_000
+
+# Storage backend used for logins and user data: "text" or "sqlite"
+STORAGE_BACKEND = "text"
+
+# Server mode defaults
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8765
+SERVER_CACHE_SIZE = 32
+
+# Write binary snapshots on save instead of the text format (text stays available via `budget export`).
+# Set with --snapshot
+SNAPSHOT_ENABLED = False
+
+# Budget types that count against the running balance
+EXPENSE_TYPES = {"expense"}
+
+REPORT_GROUPS = ["category", "type", "day", "week", "month"]
 
 SECTIONS = [
     "Budget",
     "Categories",
     "Goals",
+    "Recurring",
 ]
 
 DEFAULT_DATA = [
@@ -31,6 +84,8 @@ DEFAULT_DATA = [
     "---Categories",
     "",
     "---Goals",
+    "",
+    "---Recurring",
     ""
 ]
 
@@ -126,100 +181,1540 @@ def create_table(headers: list[str], data: list[list[str]]) -> str:
 #     )
 # )
 
+class Money(int):
+    '''
+    Amount of money stored as integer cents so sums stay exact.
+    Arithmetic falls back to plain ints, wrap the result to format it.
+    '''
+
+    @classmethod
+    def parse(cls, text: str) -> "Money":
+        '''
+        Parse a decimal amount such as "12", "-3.5" or "1200.99" into cents.
+
+        :param text: Amount as written by the user or in the data file
+        :type text: String
+        :returns: Money value
+        '''
+        text = text.strip()
+        sign = -1 if text.startswith("-") else 1
+        # At most one sign, "+-5" and "--5" are not amounts
+        whole, _, frac = (text[1:] if text.startswith(("+", "-")) else text).partition(".")
+        if not (whole or frac) or not (whole or "0").isdigit() or (frac and not frac.isdigit()) or len(frac) > 2:
+            raise ValueError(f"Invalid amount: {text!r}")
+        return cls(sign * (int(whole or "0") * 100 + int(frac.ljust(2, "0") or "0")))
+
+    def __str__(self) -> str:
+        sign = "-" if self < 0 else ""
+        whole, cents = divmod(abs(int(self)), 100)
+        return f"{sign}{whole}.{cents:02}"
+
+    def __repr__(self) -> str:
+        return f"Money({str(self)})"
+
+def parse_amount(text: str) -> tuple[Money, str]:
+    '''
+    Parse an amount with an optional currency code, e.g. "12.50" or "12.50 USD".
+
+    :param text: Amount as saved in the data file
+    :type text: String
+    :returns: Tuple of (amount, currency code)
+    '''
+    amount, _, currency = text.strip().partition(" ")
+    return Money.parse(amount), currency.strip().upper() or BASE_CURRENCY
+
+def format_amount(amount: Money, currency: str) -> str:
+    '''
+    Inverse of parse_amount, the base currency is left implicit
+    '''
+    return str(amount) if currency == BASE_CURRENCY else f"{amount} {currency}"
+
+def clean_field(text: str) -> str:
+    '''
+    Make free text safe for the comma separated data file: commas
+    become spaces and runs of whitespace collapse to one space
+    '''
+    return " ".join(text.replace(",", " ").split())
+
 class BudgetItem:
     '''
     Abstracted each specific budget item for more fine control
     '''
 
-    def __init__(self, date_val: date | str, budget_type: str, category: str, amount: str) -> None:
+    def __init__(self, date_val: date | str, budget_type: str, category: str, amount: Money | str, description: str = "", currency: str = BASE_CURRENCY) -> None:
         self.date = date_val if isinstance(date_val, date) else date.fromisoformat(date_val)
         self.type = budget_type
         self.category = category
+        if not isinstance(amount, Money):
+            amount, currency = parse_amount(amount)
         self.amount = amount
+        self.currency = currency
+        self.description = description
+
+    def amount_text(self) -> str:
+        '''
+        Amount with its currency code unless it is the base currency
+        '''
+        return format_amount(self.amount, self.currency)
 
     def __str__(self) -> str:
-        return f"{self.date},{self.type},{self.category},{self.amount}"
+        base = f"{self.date},{self.type},{self.category},{self.amount_text()}"
+        return f"{base},{self.description}" if self.description else base
 
-class User:
+# --------------------------------------------------------------
+# Currencies
+# --------------------------------------------------------------
+def parse_rate(text: str) -> int:
     '''
-    User abstraction for handling specific-user related actions (when logged in)
+    Parse a decimal exchange rate such as "1.3512" into RATE_SCALE units
+    '''
+    whole, _, frac = text.strip().partition(".")
+    if not whole.isdigit() or (frac and not frac.isdigit()) or len(frac) > 6:
+        raise ValueError(f"Invalid rate: {text!r}")
+    rate = int(whole) * RATE_SCALE + int(frac.ljust(6, "0") or "0")
+    if rate == 0:
+        raise ValueError(f"Invalid rate: {text!r}")
+    return rate
+
+class ExchangeRates:
+    '''
+    Daily rates to BASE_CURRENCY, one "date,currency,rate" line per
+    quote where rate is the value of one unit in the base currency
+    (e.g. 2024-01-02,USD,1.3512). A quote applies until the next one
+    for that currency. Rates are integers and looked up rates are
+    cached per (currency, day), so converting a large ledger is one
+    dict hit and integer math per item.
     '''
 
-    def __init__(self, username: str, password: str) -> None:
-        self.login = username+","+password
-        self.username = username
-        self.password = password
-        self.items: list[BudgetItem] = []
-        self.categories: list[str] = []
-        self.goals: list[str] = []
-        self.load_data()
+    def __init__(self, quotes: Iterable[tuple[date, str, int]] = ()) -> None:
+        self.dates: dict[str, list[date]] = {}
+        self.rates: dict[str, list[int]] = {}
+        self._cache: dict[tuple[str, date], int] = {}
+        for day, currency, rate in sorted(quotes):
+            self.dates.setdefault(currency, []).append(day)
+            self.rates.setdefault(currency, []).append(rate)
 
-    def __del__(self):
-        print(color("Logging out...", "GREEN"))
-        self.save_data()
+    @classmethod
+    def load(cls, path: str) -> "ExchangeRates":
+        '''
+        Read a rates file, blank lines and lines starting with # are skipped
 
-    #@error_boundary(err_msg="Failed to load data for client.")
-    def load_data(self):
+        :param path: Rates file path
+        :type path: String
+        :returns: ExchangeRates
+        '''
+        quotes: list[tuple[date, str, int]] = []
+        with open(path, 'r', encoding="utf-8") as file:
+            for number, line in enumerate(file, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    day, currency, rate = line.split(",")
+                    quotes.append((date.fromisoformat(day), currency.strip().upper(), parse_rate(rate)))
+                except ValueError as e:
+                    raise ValueError(f"{path} line {number}: {e}") from e
+        return cls(quotes)
+
+    def known(self, currency: str) -> bool:
         '''
-        Read saved data from the txt file and load it in
+        Whether items in this currency can be converted
         '''
-        with open(DATA_FILE_PREFIX + self.username + ".txt", 'r', encoding="utf-8") as file:
-            lines = [line.strip() for line in file.readlines()]
+        return currency == BASE_CURRENCY or currency in self.dates
 
-        # username = lines[0].split(":")[1]
-        # password = lines[1].split(":")[1]
+    def rate(self, currency: str, day: date) -> int:
+        '''
+        Rate of a currency on a day in RATE_SCALE units (latest quote on or before the day)
+        '''
+        key = (currency, day)
+        rate = self._cache.get(key)
+        if rate is None:
+            if currency == BASE_CURRENCY:
+                return RATE_SCALE
+            pos = bisect.bisect_right(self.dates.get(currency, []), day)
+            if pos == 0:
+                raise ValueError(f"No {currency} rate on or before {day}")
+            rate = self._cache[key] = self.rates[currency][pos - 1]
+        return rate
+
+    def convert(self, cents: int, currency: str, day: date) -> int:
+        '''
+        Convert an amount to BASE_CURRENCY cents, rounding half away from zero
+
+        :param cents: Amount in cents of the given currency
+        :type cents: int
+        :param currency: Currency code
+        :type currency: String
+        :param day: Day of the rate to use
+        :type day: date
+        :returns: Amount in base currency cents
+        '''
+        if currency == BASE_CURRENCY:
+            return int(cents)
+        whole, rest = divmod(abs(cents) * self.rate(currency, day), RATE_SCALE)
+        whole += 2 * rest >= RATE_SCALE
+        return whole if cents >= 0 else -whole
+
+@functools.cache
+def get_rates() -> ExchangeRates:
+    '''
+    Exchange rates from RATES_FILE, loaded once (empty if there is no file)
+    '''
+    if not os.path.exists(RATES_FILE):
+        return ExchangeRates()
+    return ExchangeRates.load(RATES_FILE)
+
+def check_currency(code: str, day: date | None = None) -> str:
+    '''
+    Normalize a currency code, raising ValueError if it has no rates
+    (or, when day is given, no rate on or before that day)
+    '''
+    code = code.upper()
+    rates = get_rates()
+    if not rates.known(code):
+        raise ValueError(f"No exchange rates for {code} in {RATES_FILE}")
+    if day is not None:
+        rates.rate(code, day)
+    return code
+
+# --------------------------------------------------------------
+# Binary snapshot format
+# --------------------------------------------------------------
+# Layout (little endian):
+#   header   -> magic, version, string count, line count per section, record count
+#   strings  -> (u32 length + utf-8 bytes) for every unique string
+#   indexes  -> u32 string index for each line of each section (categories, goals, ...)
+#   records  -> fixed-width (date ordinal, type, category, amount in cents, currency,
+#               description offset, description length) rows
+#   text     -> utf-8 descriptions, sliced out by the records when an item is decoded
+SNAPSHOT_MAGIC = b"FNS1"
+SNAPSHOT_VERSION = 1
+# Sections stored as lines of text, everything but the Budget records
+SNAPSHOT_SECTIONS = SECTIONS[1:]
+SNAPSHOT_HEADER = struct.Struct(f"<4sHI{len(SNAPSHOT_SECTIONS)}II")
+SNAPSHOT_LENGTH = struct.Struct("<I")
+SNAPSHOT_RECORD = struct.Struct("<iIIqIII")
+
+class SnapshotLedger:
+    '''
+    List-like view over the records of a snapshot file.
+    Records and their descriptions stay in the memory map and are
+    only decoded into BudgetItem objects when they are accessed.
+    '''
 
-        # Get indexes
-        budget_index = lines.index("---Budget") + 1
-        category_index = lines.index("---Categories") + 1
-        goal_index = lines.index("---Goals") + 1
+    def __init__(self, buffer: mmap.mmap | None = None, offset: int = 0, count: int = 0, strings: list[str] | None = None) -> None:
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        self._text_offset = offset + count * SNAPSHOT_RECORD.size
+        self._strings = strings or []
+        self._decoded: dict[int, BudgetItem] = {}
+        self._appended: list[BudgetItem] = []
+
+    def _decode(self, index: int) -> BudgetItem:
+        item = self._decoded.get(index)
+        if item is None:
+            ordinal, type_idx, category_idx, cents, currency_idx, text_start, text_length = SNAPSHOT_RECORD.unpack_from(
+                self._buffer, self._offset + index * SNAPSHOT_RECORD.size # type: ignore
+            )
+            text_start += self._text_offset
+            item = BudgetItem(
+                date.fromordinal(ordinal),
+                self._strings[type_idx],
+                self._strings[category_idx],
+                Money(cents),
+                self._buffer[text_start:text_start + text_length].decode("utf-8"), # type: ignore
+                self._strings[currency_idx]
+            )
+            self._decoded[index] = item
+        return item
+
+    def __len__(self) -> int:
+        return self._count + len(self._appended)
+
+    def __getitem__(self, index: int) -> BudgetItem:
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ledger index out of range")
+        if index < self._count:
+            return self._decode(index)
+        return self._appended[index - self._count]
+
+    def __iter__(self) -> Iterator[BudgetItem]:
+        for index in range(self._count):
+            yield self._decode(index)
+        yield from self._appended
+
+    def append(self, item: BudgetItem) -> None:
+        '''
+        Add a new item after the mapped records
+        '''
+        self._appended.append(item)
 
-        # Gather Budget section
-        # print(budget_index, category_index)
-        for line in lines[budget_index:category_index-1]:
-            # print(line)
+    def extend(self, items: Iterable[BudgetItem]) -> None:
+        '''
+        Add several new items after the mapped records
+        '''
+        self._appended.extend(items)
+
+    def close(self) -> None:
+        '''
+        Decode whatever is left and release the memory map
+        '''
+        if self._buffer is None:
+            return
+        self._appended = [self._decode(index) for index in range(self._count)] + self._appended
+        self._count = 0
+        self._decoded.clear()
+        self._buffer.close()
+        self._buffer = None
+
+def snapshot_path(username: str) -> str:
+    '''
+    Path of the binary snapshot for a user
+    '''
+    return DATA_FILE_PREFIX + username + SNAPSHOT_SUFFIX
+
+def write_snapshot(path: str, items: Any, sections: dict[str, list[str]]) -> None:
+    '''
+    Write the ledger and the other sections to a binary snapshot.
+    The file is written next to the target and swapped in, so an
+    open memory map of the old snapshot is never truncated.
+
+    :param path: Snapshot file path
+    :type path: String
+    :param items: Budget items to store
+    :type items: Iterable[BudgetItem]
+    :param sections: Lines of each of SNAPSHOT_SECTIONS
+    :type sections: dict[str, list[str]]
+    '''
+    strings: dict[str, int] = {}
+    # Descriptions are mostly unique, so they go to the text block instead of the
+    # string table that is decoded on every load. Repeats still share their bytes.
+    descriptions: dict[str, tuple[int, int]] = {}
+    text = bytearray()
+
+    def intern(value: str) -> int:
+        return strings.setdefault(value, len(strings))
+
+    def store(value: str) -> tuple[int, int]:
+        span = descriptions.get(value)
+        if span is None:
+            encoded = value.encode("utf-8")
+            span = descriptions[value] = (len(text), len(encoded))
+            text.extend(encoded)
+        return span
+
+    records = bytearray()
+    for item in items:
+        records += SNAPSHOT_RECORD.pack(
+            item.date.toordinal(), intern(item.type), intern(item.category), item.amount, intern(item.currency),
+            *store(item.description)
+        )
+    section_ids = [[intern(line) for line in sections.get(name, [])] for name in SNAPSHOT_SECTIONS]
+    line_ids = [index for ids in section_ids for index in ids]
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as file:
+        file.write(SNAPSHOT_HEADER.pack(
+            SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(strings), *(len(ids) for ids in section_ids),
+            len(records) // SNAPSHOT_RECORD.size
+        ))
+        for value in strings:
+            encoded = value.encode("utf-8")
+            file.write(SNAPSHOT_LENGTH.pack(len(encoded)) + encoded)
+        file.write(struct.pack(f"<{len(line_ids)}I", *line_ids))
+        file.write(records)
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+def read_snapshot(path: str) -> tuple[SnapshotLedger, dict[str, list[str]]]:
+    '''
+    Map a snapshot file into memory. Only the string table is decoded
+    up front, budget records and their descriptions are decoded lazily
+    by the returned ledger.
+
+    :param path: Snapshot file path
+    :type path: String
+    :returns: Tuple of (ledger, lines of each section)
+    '''
+    with open(path, 'rb') as file:
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic, version = struct.unpack_from("<4sH", buffer, 0)
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        buffer.close()
+        raise ValueError(f"{path} is not a supported snapshot")
+
+    string_count, *section_counts, record_count = SNAPSHOT_HEADER.unpack_from(buffer, 0)[2:]
+    offset = SNAPSHOT_HEADER.size
+    strings: list[str] = []
+    for _ in range(string_count):
+        (length,) = SNAPSHOT_LENGTH.unpack_from(buffer, offset)
+        offset += SNAPSHOT_LENGTH.size
+        strings.append(buffer[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    indexes = iter(struct.unpack_from(f"<{sum(section_counts)}I", buffer, offset))
+    offset += 4 * sum(section_counts)
+    sections = {
+        name: [strings[next(indexes)] for _ in range(count)]
+        for name, count in zip(SNAPSHOT_SECTIONS, section_counts)
+    }
+
+    return SnapshotLedger(buffer, offset, record_count, strings), sections
+
+class SnapshotError(Exception):
+    '''
+    Raised in snapshot mode when the newest copy of an account cannot be read
+    '''
+
+# --------------------------------------------------------------
+# Per-user file locks
+# --------------------------------------------------------------
+class AccountLockedError(Exception):
+    '''
+    Raised when another process already has the account open
+    '''
+
+def lock_user(username: str) -> IO[str] | None:
+    '''
+    Take an exclusive lock on the user's lock file so no other process
+    can load (and later overwrite) the same data file.
+
+    :param username: Client username
+    :type username: String
+    :returns: Open lock file that holds the lock, None if locking is unsupported
+    '''
+    if fcntl is None:
+        return None
+
+    lock_file = open(DATA_FILE_PREFIX + username + LOCK_SUFFIX, 'a', encoding="utf-8") # pylint: disable=R1732:consider-using-with
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError as e:
+        lock_file.close()
+        raise AccountLockedError(f"{username} is logged in from another process") from e
+    return lock_file
+
+def unlock_user(lock_file: IO[str] | None) -> None:
+    '''
+    Release a lock taken with lock_user
+    '''
+    if lock_file is None or fcntl is None:
+        return
+    fcntl.flock(lock_file, fcntl.LOCK_UN)
+    lock_file.close()
+
+# --------------------------------------------------------------
+# Reporting
+# --------------------------------------------------------------
+def item_amount(item: BudgetItem) -> int:
+    '''
+    Amount of a budget item in BASE_CURRENCY cents
+    '''
+    if item.currency == BASE_CURRENCY:
+        return int(item.amount)
+    return get_rates().convert(item.amount, item.currency, item.date)
+
+def item_value(item: BudgetItem) -> int:
+    '''
+    Signed value of a budget item in base currency cents (expenses are negative)
+    '''
+    amount = item_amount(item)
+    return -amount if item.type in EXPENSE_TYPES else amount
+
+def period_key(day: date, period: str) -> str:
+    '''
+    Label of the day/week/month bucket a date falls into
+    '''
+    match period:
+        case "day":
+            return day.isoformat()
+        case "week":
+            year, week, _ = day.isocalendar()
+            return f"{year}-W{week:02}"
+        case "month":
+            return f"{day.year}-{day.month:02}"
+        case _:
+            raise ValueError(f"Unknown period: {period}")
+
+SPAN_UNITS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+def parse_range(options: list[str]) -> tuple[date | None, date | None, list[str]]:
+    '''
+    Pull --from date, --to date and --last span (e.g. 30d, 6w, 3m, 1y)
+    out of a list of command options.
+
+    :param options: Command options
+    :type options: list[str]
+    :returns: Tuple of (start, end, remaining options)
+    '''
+    start = end = None
+    rest: list[str] = []
+    opts = iter(options)
+    for opt in opts:
+        match opt:
+            case "--from":
+                start = date.fromisoformat(next(opts, ""))
+            case "--to":
+                end = date.fromisoformat(next(opts, ""))
+            case "--last":
+                span = next(opts, "")
+                if len(span) < 2 or not span[:-1].isdigit() or span[-1] not in SPAN_UNITS:
+                    raise ValueError(f"Invalid span: {span!r}, use e.g. 30d, 6w, 3m or 1y")
+                start = TODAY - timedelta(days=int(span[:-1]) * SPAN_UNITS[span[-1]])
+            case _:
+                rest.append(opt)
+    return start, end, rest
+
+class DateIndex:
+    '''
+    Ledger items kept in date order. Sorted once when built, then new
+    items are inserted at their bisect position, so a date range is
+    found with two binary searches and a slice.
+    '''
+
+    def __init__(self, items: Iterable[BudgetItem]) -> None:
+        self.items = sorted(items, key=lambda item: item.date)
+        self.dates = [item.date for item in self.items]
+
+    def insert(self, item: BudgetItem) -> None:
+        '''
+        Add an item at its sorted position (after items of the same date)
+        '''
+        pos = bisect.bisect_right(self.dates, item.date)
+        self.dates.insert(pos, item.date)
+        self.items.insert(pos, item)
+
+    def between(self, start: date | None = None, end: date | None = None) -> list[BudgetItem]:
+        '''
+        Items dated between start and end, inclusive (None = unbounded)
+        '''
+        lo = 0 if start is None else bisect.bisect_left(self.dates, start)
+        hi = len(self.dates) if end is None else bisect.bisect_right(self.dates, end)
+        return self.items[lo:hi]
+
+class BudgetReport:
+    '''
+    Aggregated view over a ledger built in a single pass.
+    Keeps date-sorted prefix sums (overall and per group key) so
+    range totals are answered with a bisect instead of a rescan.
+    '''
 
-            if line.strip():
-                # print(line)
-                date_str, budget_type, category, amount = line.split(",", 3)
-                self.items.append(
-                    BudgetItem(date_str, budget_type, category, amount)
+    def __init__(self, items: Any) -> None:
+        self.dates: list[date] = []
+        self.balance: list[int] = [0]
+        # group -> key -> dates and prefix sums of the items under that key
+        self.group_dates: dict[str, dict[str, list[date]]] = {group: {} for group in REPORT_GROUPS}
+        self.group_sums: dict[str, dict[str, list[int]]] = {group: {} for group in REPORT_GROUPS}
+
+        for item in sorted(items, key=lambda item: item.date):
+            value = item_value(item)
+            keys = {
+                "category": item.category,
+                "type": item.type,
+                "day": period_key(item.date, "day"),
+                "week": period_key(item.date, "week"),
+                "month": period_key(item.date, "month"),
+            }
+            for group, key in keys.items():
+                self.group_dates[group].setdefault(key, []).append(item.date)
+                sums = self.group_sums[group].setdefault(key, [0])
+                sums.append(sums[-1] + value)
+
+            self.dates.append(item.date)
+            self.balance.append(self.balance[-1] + value)
+
+    @staticmethod
+    def _bounds(dates: list[date], start: date | None, end: date | None) -> tuple[int, int]:
+        lo = 0 if start is None else bisect.bisect_left(dates, start)
+        hi = len(dates) if end is None else bisect.bisect_right(dates, end)
+        return lo, max(lo, hi)
+
+    @classmethod
+    def _range_sum(cls, dates: list[date], sums: list[int], start: date | None, end: date | None) -> int:
+        lo, hi = cls._bounds(dates, start, end)
+        return sums[hi] - sums[lo]
+
+    def range_total(self, start: date | None = None, end: date | None = None, category: str | None = None) -> int:
+        '''
+        Net total of all items (or one category) between two dates, inclusive.
+
+        :param start: First day of the range, None for unbounded
+        :type start: date | None
+        :param end: Last day of the range, None for unbounded
+        :type end: date | None
+        :param category: Restrict to a single category
+        :type category: String | None
+        :returns: Net total over the range
+        '''
+        if category is None:
+            return self._range_sum(self.dates, self.balance, start, end)
+        if category not in self.group_sums["category"]:
+            return 0
+        return self._range_sum(self.group_dates["category"][category], self.group_sums["category"][category], start, end)
+
+    def totals(self, group: str, start: date | None = None, end: date | None = None) -> dict[str, int]:
+        '''
+        Net total per key of a grouping, over the items between two dates (inclusive).
+        Keys without items in the range are left out.
+        '''
+        totals: dict[str, int] = {}
+        for key, dates in self.group_dates[group].items():
+            lo, hi = self._bounds(dates, start, end)
+            if hi > lo:
+                sums = self.group_sums[group][key]
+                totals[key] = sums[hi] - sums[lo]
+        return totals
+
+    def running_balance(self, start: date | None = None, end: date | None = None) -> list[tuple[date, int]]:
+        '''
+        Balance at the end of each day with items between two dates (inclusive), in date order
+        '''
+        lo, hi = self._bounds(self.dates, start, end)
+        days: dict[date, int] = {}
+        for index in range(lo, hi):
+            days[self.dates[index]] = self.balance[index + 1]
+        return list(days.items())
+
+    def table(self, group: str, start: date | None = None, end: date | None = None) -> str:
+        '''
+        Format the totals of one grouping over a date range as a table
+        '''
+        rows = [[key, str(Money(value))] for key, value in sorted(self.totals(group, start, end).items())]
+        return create_table([group.capitalize(), f"Total ({BASE_CURRENCY})"], rows)
+
+# --------------------------------------------------------------
+# Goals
+# --------------------------------------------------------------
+class Goal:
+    '''
+    A plain text goal. Tracked goals subclass this and keep running
+    counters that are updated one BudgetItem at a time.
+    '''
+
+    # Category whose items affect the goal, None for every item
+    category: str | None = None
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+    def reset(self) -> None:
+        '''
+        Clear the running counters
+        '''
+
+    def update(self, item: BudgetItem) -> None:
+        '''
+        Account for one new budget item
+        '''
+
+    def status(self) -> str:
+        '''
+        Current progress as a short string
+        '''
+        return ""
+
+    def __str__(self) -> str:
+        return self.text
+
+class SaveGoal(Goal):
+    '''
+    Save a target amount (income minus expenses) between two dates
+    '''
+
+    def __init__(self, target: Money, start: date, deadline: date) -> None:
+        super().__init__(f"Save {target} by {deadline}")
+        self.target = target
+        self.start = start
+        self.deadline = deadline
+        self.saved = 0
+
+    def reset(self) -> None:
+        self.saved = 0
+
+    def update(self, item: BudgetItem) -> None:
+        if self.start <= item.date <= self.deadline:
+            self.saved += item_value(item)
+
+    def status(self) -> str:
+        percent = 100 * self.saved // self.target if self.target else 100
+        if self.saved >= self.target:
+            return f"reached ({Money(self.saved)})"
+        if TODAY > self.deadline:
+            return f"missed ({Money(self.saved)} / {self.target})"
+        return f"{Money(self.saved)} / {self.target} ({percent}%), {(self.deadline - TODAY).days} days left"
+
+    def __str__(self) -> str:
+        return f"save,{self.target},{self.start},{self.deadline}"
+
+class LimitGoal(Goal):
+    '''
+    Keep monthly spending in a category under a limit
+    '''
+
+    def __init__(self, category: str, limit: Money) -> None:
+        super().__init__(f"Keep {category} under {limit} per month")
+        self.category = category
+        self.limit = limit
+        self.monthly: dict[str, int] = {}
+
+    def reset(self) -> None:
+        self.monthly = {}
+
+    def update(self, item: BudgetItem) -> None:
+        if item.type in EXPENSE_TYPES:
+            month = period_key(item.date, "month")
+            self.monthly[month] = self.monthly.get(month, 0) + item_amount(item)
+
+    def status(self) -> str:
+        spent = self.monthly.get(period_key(TODAY, "month"), 0)
+        over = sum(1 for total in self.monthly.values() if total > self.limit)
+        state = "over" if spent > self.limit else "ok"
+        return f"{state}: {Money(spent)} / {self.limit} this month, {over} month(s) over"
+
+    def __str__(self) -> str:
+        return f"limit,{self.category},{self.limit}"
+
+def parse_goal(line: str) -> Goal:
+    '''
+    Read a goal from its saved form. Lines that are not a tracked
+    goal ("save,amount,start,deadline" or "limit,category,amount")
+    are kept as plain text goals.
+
+    :param line: Saved goal line
+    :type line: String
+    :returns: Goal
+    '''
+    parts = line.split(",")
+    try:
+        match parts:
+            case ["save", target, start, deadline]:
+                return SaveGoal(Money.parse(target), date.fromisoformat(start), date.fromisoformat(deadline))
+            case ["limit", category, limit]:
+                return LimitGoal(category, Money.parse(limit))
+            case _:
+                pass
+    except ValueError:
+        pass
+    return Goal(line)
+
+# --------------------------------------------------------------
+# Recurring transactions
+# --------------------------------------------------------------
+# Months between occurrences for each frequency, days for the others
+RECURRING_MONTHS = {"monthly": 1, "yearly": 12}
+RECURRING_DAYS = {"daily": 1, "weekly": 7}
+
+class RecurringRule:
+    '''
+    A repeating budget item (rent, salary, subscriptions) stored as one
+    rule. Occurrences are computed for a date window on demand instead
+    of being written into the ledger.
+    '''
+
+    def __init__(self, freq: str, interval: int, start: date, until: date | None, budget_type: str, category: str, amount: Money, description: str = "", currency: str = BASE_CURRENCY) -> None:
+        if freq not in RECURRING_MONTHS and freq not in RECURRING_DAYS:
+            raise ValueError(f"Unknown frequency: {freq}")
+        if interval < 1:
+            raise ValueError("Interval must be at least 1")
+        self.freq = freq
+        self.interval = interval
+        self.start = start
+        self.until = until
+        self.type = budget_type
+        self.category = category
+        self.amount = amount
+        self.currency = currency
+        self.description = description
+
+    @classmethod
+    def parse(cls, line: str) -> "RecurringRule":
+        '''
+        Read a rule from "freq,interval,start,until,type,category,amount[,description]"
+        '''
+        freq, interval, start, until, budget_type, category, amount, *description = line.split(",", 7)
+        money, currency = parse_amount(amount)
+        return cls(
+            freq, int(interval), date.fromisoformat(start), date.fromisoformat(until) if until else None,
+            budget_type, category, money, description[0] if description else "", currency
+        )
+
+    def _occurrence(self, k: int) -> date:
+        if self.freq in RECURRING_DAYS:
+            return self.start + timedelta(days=k * self.interval * RECURRING_DAYS[self.freq])
+        month = self.start.month - 1 + k * self.interval * RECURRING_MONTHS[self.freq]
+        year = self.start.year + month // 12
+        month = month % 12 + 1
+        # Clamp the 29th-31st to short months
+        return date(year, month, min(self.start.day, calendar.monthrange(year, month)[1]))
+
+    def occurrences(self, start: date | None = None, end: date | None = None) -> Iterator[date]:
+        '''
+        Dates the rule fires on between start and end (inclusive).
+        Jumps straight to the first occurrence in the window.
+
+        :param start: First day of the window, None for the rule start
+        :type start: date | None
+        :param end: Last day of the window, None for today
+        :type end: date | None
+        '''
+        end = min(end or TODAY, self.until or date.max)
+        if start is None or start <= self.start:
+            k = 0
+        elif self.freq in RECURRING_DAYS:
+            step = self.interval * RECURRING_DAYS[self.freq]
+            k = -(-(start - self.start).days // step)
+        else:
+            months = (start.year - self.start.year) * 12 + start.month - self.start.month
+            k = max(0, -(-months // (self.interval * RECURRING_MONTHS[self.freq])))
+            if self._occurrence(k) < start:
+                k += 1
+
+        day = self._occurrence(k)
+        while day <= end:
+            yield day
+            k += 1
+            day = self._occurrence(k)
+
+    def items(self, start: date | None = None, end: date | None = None) -> Iterator[BudgetItem]:
+        '''
+        BudgetItems for the occurrences in a window
+        '''
+        for day in self.occurrences(start, end):
+            yield BudgetItem(day, self.type, self.category, self.amount, self.description, self.currency)
+
+    def describe(self) -> str:
+        '''
+        Human readable form of the rule
+        '''
+        unit = {"daily": "day", "weekly": "week", "monthly": "month", "yearly": "year"}[self.freq]
+        every = f"every {unit}" if self.interval == 1 else f"every {self.interval} {unit}s"
+        until = f" until {self.until}" if self.until else ""
+        return f"{self.type} {self.category} {format_amount(self.amount, self.currency)} {every} from {self.start}{until}"
+
+    def next_occurrence(self) -> date | None:
+        '''
+        First occurrence after today, None once the rule has ended
+        '''
+        return next(self.occurrences(TOMORROW, date.max), None)
+
+    def __str__(self) -> str:
+        return f"{self.freq},{self.interval},{self.start},{self.until or ""},{self.type},{self.category},{format_amount(self.amount, self.currency)},{self.description}".rstrip(",")
+
+# --------------------------------------------------------------
+# Statement import
+# --------------------------------------------------------------
+IMPORT_DATE_FORMATS = ["%Y-%m-%d", "%Y%m%d", "%m/%d/%Y", "%d/%m/%Y"]
+IMPORT_CATEGORY = "imported"
+OFX_TRANSACTION = re.compile(r"<STMTTRN>(.*?)(?:</STMTTRN>|(?=<STMTTRN>)|$)", re.DOTALL | re.IGNORECASE)
+OFX_FIELD = re.compile(r"<(DTPOSTED|TRNAMT|NAME|MEMO)>([^<\r\n]*)", re.IGNORECASE)
+
+def parse_import_date(text: str) -> date:
+    '''
+    Parse a statement date in any of the IMPORT_DATE_FORMATS
+    '''
+    text = text.strip()
+    for fmt in IMPORT_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date: {text!r}")
+
+def statement_item(day: date, amount: str, description: str, category: str) -> BudgetItem:
+    '''
+    Build a BudgetItem from a signed statement amount (negative = expense)
+    '''
+    value = Money.parse(amount.replace("$", "").replace(",", ""))
+    return BudgetItem(
+        day,
+        "expense" if value < 0 else "income",
+        # Commas would break the text format, collapse them with the whitespace
+        clean_field(category) or IMPORT_CATEGORY,
+        Money(abs(value)),
+        clean_field(description)
+    )
+
+def read_csv_statement(path: str, category: str = IMPORT_CATEGORY) -> list[BudgetItem]:
+    '''
+    Read a bank CSV export. Needs a date column, a description/memo/payee
+    column and either a signed amount column or debit/credit columns.
+    A category column, when present, overrides the default category.
+
+    :param path: CSV file
+    :type path: String
+    :param category: Category for rows without one
+    :type category: String
+    :returns: List of BudgetItems in file order
+    '''
+    items: list[BudgetItem] = []
+    with open(path, 'r', encoding="utf-8-sig", newline="") as file:
+        for row in csv.DictReader(file):
+            # Fields past the header land under a None key, they have no column to match
+            row = {key.strip().lower(): (val or "").strip() for key, val in row.items() if key is not None}
+            description = row.get("description") or row.get("memo") or row.get("payee") or ""
+            amount = row.get("amount", "")
+            if not amount:
+                debit, credit = row.get("debit", ""), row.get("credit", "")
+                amount = f"-{debit.lstrip("-")}" if debit else credit
+            items.append(statement_item(
+                parse_import_date(row["date"]), amount, description, row.get("category") or category
+            ))
+    return items
+
+def read_ofx_statement(path: str, category: str = IMPORT_CATEGORY) -> list[BudgetItem]:
+    '''
+    Read the STMTTRN transactions of an OFX/QFX file (SGML or XML flavour).
+
+    :param path: OFX file
+    :type path: String
+    :param category: Category for every transaction
+    :type category: String
+    :returns: List of BudgetItems in file order
+    '''
+    with open(path, 'r', encoding="utf-8", errors="replace") as file:
+        text = file.read()
+
+    items: list[BudgetItem] = []
+    for block in OFX_TRANSACTION.findall(text):
+        fields = {tag.upper(): val.strip() for tag, val in OFX_FIELD.findall(block)}
+        if "DTPOSTED" not in fields or "TRNAMT" not in fields:
+            continue
+        items.append(statement_item(
+            parse_import_date(fields["DTPOSTED"][:8]),
+            fields["TRNAMT"],
+            fields.get("NAME") or fields.get("MEMO", ""),
+            category
+        ))
+    return items
+
+def read_statement(path: str, category: str = IMPORT_CATEGORY) -> list[BudgetItem]:
+    '''
+    Read a statement, choosing the format from the file extension
+    '''
+    if path.lower().endswith((".ofx", ".qfx")):
+        return read_ofx_statement(path, category)
+    return read_csv_statement(path, category)
+
+def import_key(item: BudgetItem) -> tuple[date, str, int, str]:
+    '''
+    Identity of a statement row for de-duplication: (date, currency, signed amount, description)
+    '''
+    return item.date, item.currency, -item.amount if item.type in EXPENSE_TYPES else int(item.amount), item.description
+
+# --------------------------------------------------------------
+# Storage backends
+# --------------------------------------------------------------
+class Storage(ABC):
+    '''
+    Where logins and user data live. load/save move a whole user,
+    the add_* hooks let backends persist changes as commands run and
+    transaction() wraps each command. Backends must implement
+    every abstract method or they can't be instantiated.
+    '''
+
+    @abstractmethod
+    def check_login(self, username: str, password: str) -> bool:
+        '''
+        True if the username/password pair exists
+        '''
+
+    @abstractmethod
+    def create_login(self, username: str, password: str) -> bool:
+        '''
+        Store a new login, False if it can't be created
+        '''
+
+    @abstractmethod
+    def create_data(self, username: str, password: str) -> None:
+        '''
+        Create empty data for a new login
+        '''
+
+    @abstractmethod
+    def load(self, user: Any) -> None:
+        '''
+        Fill user.items, user.categories and user.goals
+        '''
+
+    @abstractmethod
+    def save(self, user: Any) -> None:
+        '''
+        Persist whatever the backend has not written yet
+        '''
+
+    def add_category(self, username: str, name: str) -> None:
+        '''
+        Hook called when a category is created
+        '''
+
+    def add_goal(self, username: str, goal: str) -> None:
+        '''
+        Hook called when a goal is created
+        '''
+
+    def add_recurring(self, username: str, rule: str) -> None:
+        '''
+        Hook called when a recurring rule is created
+        '''
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        '''
+        Scope of a single command
+        '''
+        yield
+
+def read_text_data(path: str) -> tuple[list[BudgetItem], dict[str, list[str]]]:
+    '''
+    Parse a data-<user>.txt file. Sections start with a "---Name" line
+    and may appear in any order, missing ones are left empty.
+
+    :param path: Data file path
+    :type path: String
+    :returns: Tuple of (items, lines of every other section)
+    '''
+    sections: dict[str, list[str]] = {name: [] for name in SECTIONS}
+    current = None
+    with open(path, 'r', encoding="utf-8") as file:
+        # First line is the login, skipped until the first section header
+        for raw in file:
+            line = raw.strip()
+            if line.startswith("---"):
+                current = sections.setdefault(line[3:], [])
+            elif line and current is not None:
+                current.append(line)
+
+    # Gather Budget section
+    items = [BudgetItem(*line.split(",", 4)) for line in sections.pop("Budget")]
+    return items, sections
+
+class TextStorage(Storage):
+    '''
+    The original layout: logins.txt plus one data-<user>.txt per user,
+    optionally with a binary snapshot next to it.
+    '''
+
+    def check_login(self, username: str, password: str) -> bool:
+        # Try loging in
+        with open(LOGIN_FILE, 'r', encoding="utf-8") as file:
+            for login in file:
+                usr, pswrd = login.strip().split(",")
+                if username == usr and password == str(pswrd):
+                    return True
+        return False
+
+    def create_login(self, username: str, password: str) -> bool:
+        with open(LOGIN_FILE, 'a', encoding="utf-8") as logins:
+            logins.write(f"{username},{password}\n")
+        return True
+
+    def create_data(self, username: str, password: str) -> None:
+        try:
+            with open(DATA_FILE_PREFIX + username + ".txt", 'x', encoding="utf-8") as data:
+                # Set password
+                data.write(f"{username},{password}\n")
+                data.writelines([default + "\n" for default in DEFAULT_DATA])
+            print("Created new file for user.")
+        except FileExistsError:
+            print("File already exists.")
+
+    def load(self, user: Any) -> None:
+        '''
+        Read saved data from the txt file.
+        A snapshot that is at least as new as the txt file is mapped instead,
+        in snapshot mode an unreadable one stops the load since the txt file is stale.
+        '''
+        text_path = DATA_FILE_PREFIX + user.username + ".txt"
+        snap_path = snapshot_path(user.username)
+        if os.path.exists(snap_path) and (
+            not os.path.exists(text_path) or os.path.getmtime(snap_path) >= os.path.getmtime(text_path)
+        ):
+            try:
+                user.items, sections = read_snapshot(snap_path)
+                user.load_sections(sections)
+                return
+            except (ValueError, struct.error) as e:
+                if user.snapshot:
+                    raise SnapshotError(
+                        f"Cannot read {snap_path} ({e}). Remove it or start without --snapshot to load the older text data."
+                    ) from e
+                print(color(f"Ignoring snapshot ({e}), loading text data.", "YELLOW"))
+
+        user.items, sections = read_text_data(text_path)
+        user.load_sections(sections)
+
+    def save(self, user: Any) -> None:
+        '''
+        Write the user to its txt file, or to a snapshot in snapshot mode
+        '''
+        if user.snapshot:
+            write_snapshot(snapshot_path(user.username), user.items, user.sections())
+            return
+
+        if isinstance(user.items, SnapshotLedger):
+            user.items.close()
+        user.export_data(DATA_FILE_PREFIX + user.username + ".txt")
+        # Text file is now the newest copy, drop the stale snapshot
+        if os.path.exists(snapshot_path(user.username)):
+            os.remove(snapshot_path(user.username))
+
+SQLITE_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS logins (
+    user TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    date TEXT NOT NULL,
+    type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    currency TEXT NOT NULL DEFAULT '{BASE_CURRENCY}'
+);
+CREATE INDEX IF NOT EXISTS items_user_date_category ON items (user, date, category);
+CREATE TABLE IF NOT EXISTS categories (
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (user, name)
+);
+CREATE TABLE IF NOT EXISTS goals (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    goal TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS recurring (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    rule TEXT NOT NULL
+);
+'''
+
+def item_row(username: str, item: BudgetItem) -> tuple[str, str, str, str, int, str, str]:
+    '''
+    Column values of an items table row
+    '''
+    return username, item.date.isoformat(), item.type, item.category, int(item.amount), item.description, item.currency
+
+def row_item(row: tuple[str, str, str, int, str, str]) -> BudgetItem:
+    '''
+    BudgetItem from (date, type, category, amount, description, currency) columns
+    '''
+    day, budget_type, category, cents, description, currency = row
+    return BudgetItem(day, budget_type, category, Money(cents), description, currency)
+
+class SqliteLedger:
+    '''
+    List-like view of one user's rows in the items table.
+    Nothing is loaded up front, rows are streamed when iterated
+    and appends are inserted straight away.
+    '''
+
+    COLUMNS = "date, type, category, amount, description, currency"
+
+    def __init__(self, storage: "SqliteStorage", username: str) -> None:
+        self._storage = storage
+        self._username = username
+        self._count: int | None = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            (self._count,) = self._storage.conn().execute(
+                "SELECT COUNT(*) FROM items WHERE user = ?", (self._username,)
+            ).fetchone()
+        return self._count
+
+    def __getitem__(self, index: int) -> BudgetItem:
+        if index < 0:
+            index += len(self)
+        row = self._storage.conn().execute(
+            f"SELECT {self.COLUMNS} FROM items WHERE user = ? ORDER BY id LIMIT 1 OFFSET ?", (self._username, index)
+        ).fetchone()
+        if index < 0 or row is None:
+            raise IndexError("ledger index out of range")
+        return row_item(row)
+
+    def __iter__(self) -> Iterator[BudgetItem]:
+        cursor = self._storage.conn().execute(
+            f"SELECT {self.COLUMNS} FROM items WHERE user = ? ORDER BY id", (self._username,)
+        )
+        for row in cursor:
+            yield row_item(row)
+
+    def between(self, start: date | None = None, end: date | None = None) -> list[BudgetItem]:
+        '''
+        Items dated between start and end (inclusive), in date order, through the (user, date) index
+        '''
+        cursor = self._storage.conn().execute(
+            f"SELECT {self.COLUMNS} FROM items WHERE user = ? AND date BETWEEN ? AND ? ORDER BY date, id",
+            (self._username, (start or date.min).isoformat(), (end or date.max).isoformat())
+        )
+        return [row_item(row) for row in cursor]
+
+    def append(self, item: BudgetItem) -> None:
+        '''
+        Insert one item
+        '''
+        self.extend([item])
+
+    def extend(self, items: Iterable[BudgetItem]) -> None:
+        '''
+        Insert several items with one statement
+        '''
+        rows = [item_row(self._username, item) for item in items]
+        self._storage.conn().executemany(
+            "INSERT INTO items (user, date, type, category, amount, description, currency) VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+        if self._count is not None:
+            self._count += len(rows)
+
+class SqliteStorage(Storage):
+    '''
+    Every user in one SQLite database. Changes are written as commands
+    run (each command is one transaction), so login only reads the
+    categories and goals and logout only commits.
+    '''
+
+    def __init__(self, path: str = DATABASE_FILE) -> None:
+        self.path = path
+        self.local = threading.local()
+
+    def conn(self) -> sqlite3.Connection:
+        '''
+        Connection for the current thread, created on first use
+        '''
+        connection = getattr(self.local, "conn", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.executescript(SQLITE_SCHEMA)
+            self.local.conn = connection
+        return connection
+
+    def check_login(self, username: str, password: str) -> bool:
+        row = self.conn().execute(
+            "SELECT 1 FROM logins WHERE user = ? AND password = ?", (username, password)
+        ).fetchone()
+        return row is not None
+
+    def create_login(self, username: str, password: str) -> bool:
+        with self.conn() as conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO logins (user, password) VALUES (?, ?)", (username, password))
+        return cursor.rowcount == 1
+
+    def create_data(self, username: str, password: str) -> None:
+        # Rows are created as the user adds them
+        print("Created new data for user.")
+
+    def load(self, user: Any) -> None:
+        conn = self.conn()
+        user.items = SqliteLedger(self, user.username)
+        user.load_sections({
+            "Categories": [name for (name,) in conn.execute("SELECT name FROM categories WHERE user = ? ORDER BY rowid", (user.username,))],
+            "Goals": [goal for (goal,) in conn.execute("SELECT goal FROM goals WHERE user = ? ORDER BY id", (user.username,))],
+            "Recurring": [rule for (rule,) in conn.execute("SELECT rule FROM recurring WHERE user = ? ORDER BY id", (user.username,))],
+        })
+
+    def save(self, user: Any) -> None:
+        self.conn().commit()
+
+    def add_category(self, username: str, name: str) -> None:
+        self.conn().execute("INSERT OR IGNORE INTO categories (user, name) VALUES (?, ?)", (username, name))
+
+    def add_goal(self, username: str, goal: str) -> None:
+        self.conn().execute("INSERT INTO goals (user, goal) VALUES (?, ?)", (username, goal))
+
+    def add_recurring(self, username: str, rule: str) -> None:
+        self.conn().execute("INSERT INTO recurring (user, rule) VALUES (?, ?)", (username, rule))
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        with self.conn():
+            yield
+
+def migrate_to_sqlite(path: str = DATABASE_FILE) -> int:
+    '''
+    One-shot copy of logins.txt and every user's text data into an SQLite database.
+    Users are loaded through TextStorage, so a snapshot newer than data-<user>.txt
+    is what gets copied. Users that are already in the database are skipped, and
+    users that can't be loaded (logged in elsewhere, unreadable snapshot) are left
+    for a later run, so it is safe to re-run.
+
+    :param path: Database file to create or fill
+    :type path: String
+    :returns: Number of users migrated
+    '''
+    storage = SqliteStorage(path)
+    migrated = 0
+    with open(LOGIN_FILE, 'r', encoding="utf-8") as file:
+        logins = [line.strip().split(",", 1) for line in file if line.strip()]
+
+    for username, password in logins:
+        with storage.conn() as conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO logins (user, password) VALUES (?, ?)", (username, password))
+            if cursor.rowcount != 1:
+                print(f"{username}: already migrated")
+                continue
+
+            data_path = DATA_FILE_PREFIX + username + ".txt"
+            if os.path.exists(data_path) or os.path.exists(snapshot_path(username)):
+                try:
+                    with User(username, password, snapshot=True, storage=TextStorage()) as user:
+                        items, sections = list(user.items), user.sections()
+                except (AccountLockedError, SnapshotError) as e:
+                    conn.rollback()
+                    print(f"{username}: not migrated, {e}")
+                    continue
+                conn.executemany(
+                    "INSERT INTO items (user, date, type, category, amount, description, currency) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (item_row(username, item) for item in items)
                 )
+                conn.executemany("INSERT OR IGNORE INTO categories (user, name) VALUES (?, ?)", ((username, name) for name in sections["Categories"]))
+                conn.executemany("INSERT INTO goals (user, goal) VALUES (?, ?)", ((username, goal) for goal in sections["Goals"]))
+                conn.executemany("INSERT INTO recurring (user, rule) VALUES (?, ?)", ((username, rule) for rule in sections["Recurring"]))
+                print(f"{username}: {len(items)} items, {len(sections["Categories"])} categories, {len(sections["Goals"])} goals, {len(sections["Recurring"])} recurring")
+        migrated += 1
+    return migrated
+
+@functools.cache
+def get_storage(backend: str | None = None) -> Storage:
+    '''
+    Shared storage instance for a backend (STORAGE_BACKEND by default)
+    '''
+    match backend or STORAGE_BACKEND:
+        case "sqlite":
+            return SqliteStorage()
+        case "text":
+            return TextStorage()
+        case other:
+            raise ValueError(f"Unknown storage backend: {other}")
+
+# --------------------------------------------------------------
+# Command parsing
+# --------------------------------------------------------------
+# (action, flag) -> handler, filled in by register_command on User methods
+COMMANDS: dict[tuple[str, str], Callable[..., None]] = {}
+
+def register_command(action: str, *flags: str) -> Callable[..., Any]:
+    '''
+    Decorator registering a User method as the handler of an action and its flags.
+    The handler receives the arguments that follow the flag.
+
+    :param action: Command word, e.g. "budget"
+    :type action: String
+    :param flags: Flag spellings handled, e.g. "add", "-a"
+    :type flags: String
+    '''
+    def decorator(func: Callable[..., None]):
+        for flag in flags:
+            COMMANDS[(action, flag)] = func
+        return func
+    return decorator
+
+def tokenize(cmd: str) -> list[str]:
+    '''
+    Split a command line into tokens in a single pass.
+    Whitespace separates tokens, single or double quotes group words
+    (several quoted arguments are allowed) and a backslash escapes a
+    following quote, backslash or whitespace. Any other backslash is
+    kept as is, so Windows paths survive unquoted.
+
+    :param cmd: Command line
+    :type cmd: String
+    :returns: List of tokens
+    '''
+    tokens: list[str] = []
+    current: list[str] = []
+    in_token = False
+    quote = None
+    index = 0
+
+    while index < len(cmd):
+        char = cmd[index]
+        index += 1
+        if char == "\\" and index < len(cmd) and (cmd[index] in "\"'\\" or cmd[index].isspace()):
+            current.append(cmd[index])
+            index += 1
+            in_token = True
+        elif quote:
+            if char == quote:
+                quote = None
+            else:
+                current.append(char)
+        elif char in "\"'":
+            quote = char
+            in_token = True
+        elif char.isspace():
+            if in_token:
+                tokens.append("".join(current))
+                current.clear()
+                in_token = False
+        else:
+            current.append(char)
+            in_token = True
+
+    if quote:
+        raise ValueError(f"Unterminated {quote} quote in command")
+    if in_token:
+        tokens.append("".join(current))
+    return tokens
 
-        for line in lines[category_index:goal_index-1]:
-            self.categories.append(line)
+def budget_add_item(args: list[str]) -> BudgetItem:
+    '''
+    Build the item of a "budget add" command, shared by the command
+    handler and the batch fast path. Arguments past the currency are ignored.
 
-        # Gather Goals
-        for line in lines[goal_index:]:
-            self.goals.append(line)
+    :param args: type, category, amount and an optional currency code
+    :type args: list[str]
+    :returns: BudgetItem dated today
+    :raises ValueError: Missing arguments, bad amount or unknown currency
+    '''
+    budget_type, category = (clean_field(arg) for arg in args[:2]) if len(args) >= 3 else ("", "")
+    if not budget_type or not category:
+        raise ValueError("Usage: budget add (expense | income) category amount [currency]")
+    amount = Money.parse(args[2])
+    currency = check_currency(args[3], TODAY) if len(args) > 3 else BASE_CURRENCY
+    return BudgetItem(TODAY, budget_type, category, amount, currency=currency)
+
+# Users that still hold a lock and may have unsaved changes
+OPEN_USERS: set["User"] = set()
+
+def close_all_users() -> None:
+    '''
+    Flush and unlock every open user. Registered with atexit so data is
+    saved on any normal interpreter exit, including sys.exit from a signal.
+    '''
+    for user in list(OPEN_USERS):
+        user.close()
 
+atexit.register(close_all_users)
 
-        # print("Class dict:", self.__dict__)
+def exit_on_signal(signum: int, _frame: Any) -> None:
+    '''
+    Signal handler that only raises SystemExit. Saving happens afterwards
+    in finally blocks and atexit, never inside the handler itself.
+    '''
+    sys.exit(128 + signum)
+
+class User:
+    '''
+    User abstraction for handling specific-user related actions (when logged in)
+    '''
+
+    def __init__(self, username: str, password: str, snapshot: bool | None = None, storage: "Storage | None" = None) -> None:
+        self._lock_file = lock_user(username)
+        self.login = username+","+password
+        self.username = username
+        self.password = password
+        self.snapshot = SNAPSHOT_ENABLED if snapshot is None else snapshot
+        self.storage = storage or get_storage()
+        self.items: list[BudgetItem] | SnapshotLedger | SqliteLedger = []
+        # Insertion-ordered set of category names
+        self.categories: dict[str, None] = {}
+        self.goals: list[Goal] = []
+        self.recurring: list[RecurringRule] = []
+        self._category_index: dict[str, list[BudgetItem]] | None = None
+        self._import_keys: Counter[tuple[date, str, int, str]] | None = None
+        self._goal_index: dict[str | None, list[Goal]] | None = None
+        self._date_index: DateIndex | None = None
+        self._report: BudgetReport | None = None
+        try:
+            self.load_data()
+        except BaseException:
+            unlock_user(self._lock_file)
+            raise
+
+        # Set whenever something changes, so closing an untouched account writes nothing
+        self.dirty = False
+        self.closed = False
+        OPEN_USERS.add(self)
+
+    def __enter__(self) -> "User":
+        return self
+
+    def __exit__(self, *_exc: Any) -> None:
+        self.close()
+
+    def close(self):
+        '''
+        Log out: save the user's data if it changed and release the account lock.
+        Safe to call more than once.
+        '''
+        if self.closed:
+            return
+        print(color("Logging out...", "GREEN"))
+        try:
+            if self.dirty:
+                self.save_data()
+        finally:
+            unlock_user(self._lock_file)
+            self.closed = True
+            OPEN_USERS.discard(self)
+
+    def load_sections(self, sections: dict[str, list[str]]):
+        '''
+        Set categories, goals and recurring rules from their saved lines
+        '''
+        self.categories = dict.fromkeys(sections.get("Categories", []))
+        self.goals = [parse_goal(line) for line in sections.get("Goals", [])]
+        self.recurring = [RecurringRule.parse(line) for line in sections.get("Recurring", [])]
+
+    def sections(self) -> dict[str, list[str]]:
+        '''
+        Saved lines of every section but Budget
+        '''
+        return {
+            "Categories": list(self.categories),
+            "Goals": [str(goal) for goal in self.goals],
+            "Recurring": [str(rule) for rule in self.recurring],
+        }
+
+    #@error_boundary(err_msg="Failed to load data for client.")
+    def load_data(self):
+        '''
+        Load the user's ledger, categories and goals from storage
+        '''
+        self.storage.load(self)
 
     def save_data(self):
         '''
-        Write saved class data to txt file for re-use.
+        Write the user's data back to storage for re-use.
         '''
-        with open(DATA_FILE_PREFIX + self.username + ".txt", 'w', encoding="utf-8") as file:
-            file.write(self.login + "\n")
+        self.storage.save(self)
+        self.dirty = False
 
-            self.categories = list(filter(None, self.categories))
-            self.goals = list(filter(None, self.goals))
+    def export_data(self, path: str):
+        '''
+        Write class data in the plain text format.
+        The file is synced and swapped in so a crash never leaves half a ledger.
+
+        :param path: File to write to
+        :type path: String
+        '''
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding="utf-8") as file:
+            file.write(self.login + "\n")
 
             # Write Budget
             file.write("---Budget\n")
             for item in self.items:
                 file.write(f"{str(item)}\n")
 
-            # Write categories
-            file.write("---Categories\n")
-            for cat in self.categories:
-                file.write(f"{cat}\n")
+            # Write categories, goals and recurring rules
+            for name, lines in self.sections().items():
+                file.write(f"---{name}\n")
+                for line in lines:
+                    file.write(f"{line}\n")
 
-            # Write goals
-            file.write("---Goals\n")
-            for goal in self.goals:
-                file.write(f"{goal}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, path)
 
     #@error_boundary(err_msg="Failed to execute client command.")
     def command(self, cmd: str):
@@ -229,88 +1724,648 @@ class User:
         :param cmd: Command to process
         :type cmd: String
         '''
-        action = None
-        modifiers = None
+        try:
+            tokens = tokenize(cmd)
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
+
+        if not tokens:
+            return
+
+        action, *modifiers = tokens
+        # If no modifiers, display command help
+        flag = modifiers[0] if modifiers else "help"
+        handler = COMMANDS.get((action, flag))
+        if handler is None:
+            if action in COMMAND_ACTIONS:
+                print(color(f"Unknown option '{flag}' for {action}, try: {action} help", "RED"))
+            else:
+                print(color(f"Unknown command '{action}'", "RED"))
+            return
+        with self.storage.transaction():
+            handler(self, modifiers[1:])
+
+    def add_item(self, item: BudgetItem):
+        '''
+        Append an item to the ledger and keep derived indexes in sync
+        '''
+        self.add_items([item])
 
-        if cmd.find('"') != -1:
-            str_before = cmd[:cmd.find('"')].split(" ")[:-1]
-            #print(str_before)
-            action = str_before[0]
-            modifiers = str_before[1:] + [cmd[cmd.find('"'):].strip('"')]
+    def add_items(self, items: list[BudgetItem]):
+        '''
+        Append many items to the ledger at once
+        '''
+        if not items:
+            return
+        self.items.extend(items)
+        self.dirty = True
+        self._report = None
+        if self._category_index is not None:
+            for item in items:
+                self._category_index.setdefault(item.category, []).append(item)
+        if self._import_keys is not None:
+            self._import_keys.update(import_key(item) for item in items)
+        if self._goal_index is not None:
+            self._update_goals(items)
+        if self._date_index is not None:
+            for item in items:
+                self._date_index.insert(item)
+
+    def items_between(self, start: date | None = None, end: date | None = None) -> list[BudgetItem]:
+        '''
+        Ledger items dated between start and end (inclusive), in date order.
+        SQLite ledgers use the items date index, others a DateIndex built on first use.
+        '''
+        if isinstance(self.items, SqliteLedger):
+            items = self.items.between(start, end)
         else:
-            action, *modifiers = cmd.split(" ")
+            if self._date_index is None:
+                self._date_index = DateIndex(self.items)
+            items = self._date_index.between(start, end)
+        if not self.recurring:
+            return items
+        return list(heapq.merge(items, self.recurring_items(start, end), key=lambda item: item.date))
+
+    def recurring_items(self, start: date | None = None, end: date | None = None) -> list[BudgetItem]:
+        '''
+        Occurrences of every recurring rule between start and end (None = today), in date order
+        '''
+        return sorted(
+            (item for rule in self.recurring for item in rule.items(start, end)),
+            key=lambda item: item.date
+        )
 
+    def goal_index(self) -> dict[str | None, list[Goal]]:
+        '''
+        Goals keyed by the category they watch (None = every item).
+        Built on first use by replaying the ledger and recurring occurrences
+        once, afterwards add_items only touches the goals affected by each new item.
+        '''
+        if self._goal_index is None:
+            self._goal_index = {}
+            for goal in self.goals:
+                goal.reset()
+                self._goal_index.setdefault(goal.category, []).append(goal)
+            try:
+                self._update_goals(itertools.chain(self.items, self.recurring_items()))
+            except ValueError:
+                # Missing exchange rate, rebuild from scratch next time
+                self._goal_index = None
+                raise
+        return self._goal_index
+
+    def _update_goals(self, items: Iterable[BudgetItem]):
+        index = self._goal_index or {}
+        every = index.get(None, [])
+        for item in items:
+            for goal in every:
+                goal.update(item)
+            for goal in index.get(item.category, ()):
+                goal.update(item)
+
+    def import_items(self, items: list[BudgetItem]) -> int:
+        '''
+        Add statement rows that are not already in the ledger.
+        Rows are matched on (date, currency, amount, description) through a hash index,
+        counting repeats so genuinely identical transactions in one statement
+        are kept while overlap with earlier imports is skipped.
+
+        :param items: Rows read from a statement
+        :type items: list[BudgetItem]
+        :returns: Number of rows added
+        '''
+        if self._import_keys is None:
+            self._import_keys = Counter(import_key(item) for item in self.items)
+
+        seen: Counter[tuple[date, str, int, str]] = Counter()
+        new_items: list[BudgetItem] = []
+        for item in items:
+            key = import_key(item)
+            seen[key] += 1
+            if seen[key] > self._import_keys[key]:
+                new_items.append(item)
+
+        self.add_items(new_items)
+        return len(new_items)
+
+    @register_command("budget", "add", "-a")
+    def _budget_add(self, args: list[str]):
+        try:
+            item = budget_add_item(args)
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
+        self.add_item(item)
+        print(color(">", "BLUE"), f"added {item.type}: {item.category} {item.amount_text()}")
 
-        # If no modifiers, display command help
-        if len(modifiers) < 1:
-            getattr(self, f"_{action}")(["-h"])
+    @register_command("budget", "import", "-i")
+    def _budget_import(self, args: list[str]):
+        if not args:
+            print(color("Usage: budget import file [--category name]", "RED"))
+            return
+        category = args[args.index("--category") + 1] if "--category" in args[:-1] else IMPORT_CATEGORY
+        try:
+            items = read_statement(args[0], category)
+        except (OSError, ValueError, KeyError) as e:
+            print(color(f"Failed to import {args[0]}: {e}", "RED"))
+            return
+        added = self.import_items(items)
+        print(color(">", "BLUE"), f"imported {added} new items ({len(items) - added} already present)")
+
+    @register_command("budget", "show", "-s")
+    def _budget_show(self, args: list[str]):
+        try:
+            start, end, _ = parse_range(args)
+        except ValueError as e:
+            print(color(str(e), "RED"))
             return
-        # print(action, modifiers)
-        match action:
-            case "budget":
-                self._budget(modifiers)
-            case "goal":
-                self._goal(modifiers)
-            case "category":
-                self._category(modifiers)
-            case _:
-                pass
 
-    def _budget(self, modifiers: list[str]):
-        #to_int = int(modifiers[1])
-        flag = modifiers[0]
-        match flag:
-            case "add":
-                print(color(">", "BLUE"), f"added {flag}: {modifiers[1]}")
-                self.items.append(
-                    BudgetItem(
-                        TODAY,
-                        modifiers[1],
-                        modifiers[2],
-                        modifiers[3]
-                    )
-                )
-            case "show":
-                print([str(item) for item in self.items])
-            case _:
-                pass
+        items = self.items_between(start, end) if start or end else itertools.chain(self.items, self.recurring_items())
+        print(create_table(
+            ["Date", "Type", "Category", "Amount", "Description"],
+            [[str(item.date), item.type, item.category, item.amount_text(), item.description] for item in items]
+        ))
+
+    @register_command("budget", "export")
+    def _budget_export(self, args: list[str]):
+        path = args[0] if args else DATA_FILE_PREFIX + self.username + ".txt"
+        self.export_data(path)
+        print(color(">", "BLUE"), f"exported {len(self.items)} items to {path}")
+
+    @register_command("budget", "help", "-h")
+    def _budget_help(self, _args: list[str]):
+        print(color("\n~ Budget Help ~\n", "CYAN"))
+        print("\tbudget add (expense | income) category amount [currency]\t--> Adds an item dated today")
+        print("\tbudget import [-i] file [--category name]\t|> Imports a CSV/OFX statement, skipping rows already present")
+        print("\tbudget show [-s] [--from date] [--to date] [--last 30d]\t|> Lists budget items, optionally in a date range")
+        print("\tbudget report [--by group] [--from date] [--to date] [--last 30d] [--running]\t|> Totals and balance")
+        print("\tbudget export [file]\t|> Writes the ledger in the text format")
+        print("\tbudget help [-h]\t|> Shows this message\n")
+
+    def report(self) -> BudgetReport:
+        '''
+        Aggregated report of the ledger, rebuilt only after the ledger changes
+        '''
+        if self._report is None:
+            self._report = BudgetReport(itertools.chain(self.items, self.recurring_items()))
+        return self._report
+
+    @register_command("budget", "report", "-r")
+    def _budget_report(self, options: list[str]):
+        try:
+            start, end, rest = parse_range(options)
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
+        group = rest[rest.index("--by") + 1] if "--by" in rest[:-1] else "category"
 
+        if group not in REPORT_GROUPS:
+            print(color(f"Report can only be grouped by: {", ".join(REPORT_GROUPS)}", "RED"))
+            return
 
+        try:
+            report = self.report()
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
+        span = f"{start or "start"} -> {end or "now"}" if start or end else "all time"
+        print(color(f"> Report by {group} ({span})", "BLUE"))
+        print(report.table(group, start, end))
+        if start or end:
+            print(f"Net {span}: {Money(report.range_total(start, end))}")
+            if group != "category":
+                for category, total in sorted(report.totals("category", start, end).items()):
+                    print(f"\t{category}: {Money(total)}")
+        if "--running" in rest:
+            print(color("> Running balance", "BLUE"))
+            print(create_table(
+                ["Date", f"Balance ({BASE_CURRENCY})"],
+                [[str(day), str(Money(value))] for day, value in report.running_balance(start, end)]
+            ))
+        balance = Money(report.balance[-1])
+        print(f"Balance: {color(str(balance), "GREEN" if balance >= 0 else "RED")}")
+
+    @register_command("recurring", "add", "-a")
+    def _recurring_add(self, args: list[str]):
+        if len(args) < 4:
+            print(color("Usage: recurring add (daily | weekly | monthly | yearly) type category amount [--from date] [--every n] [--until date] [--currency code] [--note text]", "RED"))
+            return
+        freq, budget_type, category, amount, *options = args
+        # Rules are saved as one comma separated line
+        budget_type, category = clean_field(budget_type), clean_field(category)
+        opts = dict(zip(options[::2], options[1::2]))
+        try:
+            if not budget_type or not category:
+                raise ValueError("Recurring rules need a type and a category")
+            start = date.fromisoformat(opts["--from"]) if "--from" in opts else TODAY
+            rule = RecurringRule(
+                freq,
+                int(opts.get("--every", "1")),
+                start,
+                date.fromisoformat(opts["--until"]) if "--until" in opts else None,
+                budget_type,
+                category,
+                Money.parse(amount),
+                clean_field(opts.get("--note", "")),
+                check_currency(opts.get("--currency", BASE_CURRENCY), start)
+            )
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
 
-    def _goal(self, modifiers: list[str]):
-        flag = modifiers[0]
-        match flag:
-            case "list" | "-l":
-                print(color("> Goals", "BLUE"))
-                print(self.goals)
-            case "help" | "-h":
-                print(color("\n~ Goal Help ~\n", "CYAN"))
-            case _:
-                pass
+        self.recurring.append(rule)
+        self.storage.add_recurring(self.username, str(rule))
+        self.dirty = True
+        # Views that include recurring occurrences are rebuilt on next use
+        self._report = None
+        self._category_index = None
+        self._goal_index = None
+        print(color(">", "BLUE"), f"added recurring: {rule.describe()}")
+
+    @register_command("recurring", "list", "-l")
+    def _recurring_list(self, _args: list[str]):
+        print(color("> Recurring", "BLUE"))
+        print(create_table(
+            ["#", "Rule", "Next"],
+            [[str(i), rule.describe(), str(rule.next_occurrence() or "ended")] for i, rule in enumerate(self.recurring, 1)]
+        ))
+
+    @register_command("recurring", "help", "-h")
+    def _recurring_help(self, _args: list[str]):
+        print(color("\n~ Recurring Help ~\n", "CYAN"))
+        print("\trecurring add [-a] freq type category amount [--from date] [--every n] [--until date] [--currency code] [--note text]")
+        print("\t\t--> Repeats an item daily, weekly, monthly or yearly (shown in budget show/report up to today)")
+        print("\trecurring list [-l]\t|> Lists recurring rules and their next date")
+        print("\trecurring help [-h]\t|> Shows this message\n")
+
+    @register_command("currency", "list", "-l")
+    def _currency_list(self, _args: list[str]):
+        rates = get_rates()
+        print(color(f"> Exchange rates to {BASE_CURRENCY} ({RATES_FILE})", "BLUE"))
+        print(create_table(
+            ["Currency", "Quotes", "Latest", "Rate"],
+            [
+                [code, str(len(days)), str(days[-1]), f"{rates.rates[code][-1] / RATE_SCALE:g}"]
+                for code, days in sorted(rates.dates.items())
+            ]
+        ))
+
+    @register_command("currency", "help", "-h")
+    def _currency_help(self, _args: list[str]):
+        print(color("\n~ Currency Help ~\n", "CYAN"))
+        print(f"\tItems without a currency are in {BASE_CURRENCY}, reports convert everything to {BASE_CURRENCY}")
+        print(f"\tRates are read from {RATES_FILE}, one 'date,currency,rate' line per quote (e.g. 2024-01-02,USD,1.3512)")
+        print("\tcurrency list [-l]\t|> Lists the loaded exchange rates")
+        print("\tcurrency help [-h]\t|> Shows this message\n")
+
+    @register_command("goal", "list", "-l")
+    def _goal_list(self, _args: list[str]):
+        try:
+            self.goal_index()
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
+        print(color("> Goals", "BLUE"))
+        print(create_table(
+            ["#", "Goal", "Progress"],
+            [[str(i), goal.text, goal.status()] for i, goal in enumerate(self.goals, 1)]
+        ))
+
+    @register_command("goal", "add", "-a")
+    def _goal_add(self, args: list[str]):
+        try:
+            match args:
+                case ["save", target, deadline]:
+                    goal: Goal = SaveGoal(Money.parse(target), TODAY, date.fromisoformat(deadline))
+                case ["limit", category, limit]:
+                    goal = LimitGoal(clean_field(category), Money.parse(limit))
+                case [text] if text:
+                    goal = Goal(" ".join(text.replace(",", " ").split()))
+                case _:
+                    print(color("Usage: goal add (save amount date | limit category amount | 'text')", "RED"))
+                    return
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
 
-    def _category(self, modifiers: list[str]):
-        flag = modifiers[0]
-        match flag:
-            case "add" | "-a":
-                if modifiers[1]:
-                    if modifiers[1].find("-") != -1:
-                        print(color("Only strings can be added to categries not flags. ", "RED"))
-                        return
-
-                    if modifiers[1] in self.categories:
-                        return
-                    self.categories.append(modifiers[1])
-                print(self.categories)
-            case "list" | "-l":
-                print(color("> Categories", "BLUE"))
-                print(self.categories)
-            case "help" | "-h":
-                print(color("\n~ Category Help ~\n", "CYAN"))
-                print("\tcategory add 'name'\t--> Creates new category")
-                print("\tcategory list [-l]\t|> Lists all current categories")
-                print("\tcategory help [-h]\t|> Shows this message\n")
-            case _:
-                pass
+        self.goals.append(goal)
+        self.storage.add_goal(self.username, str(goal))
+        self.dirty = True
+        if self._goal_index is not None:
+            self._goal_index.setdefault(goal.category, []).append(goal)
+            items = (
+                itertools.chain(self.items, self.recurring_items()) if goal.category is None
+                else self.category_index().get(goal.category, [])
+            )
+            try:
+                for item in items:
+                    goal.update(item)
+            except ValueError:
+                # Missing exchange rate, goal list rebuilds and reports it
+                self._goal_index = None
+        print(color(">", "BLUE"), f"added goal: {goal.text}")
+
+    @register_command("goal", "help", "-h")
+    def _goal_help(self, _args: list[str]):
+        print(color("\n~ Goal Help ~\n", "CYAN"))
+        print("\tgoal add [-a] save amount date\t--> Save an amount from today until a date")
+        print("\tgoal add [-a] limit category amount\t--> Keep monthly spending in a category under an amount")
+        print("\tgoal add [-a] 'text'\t--> Plain text goal")
+        print("\tgoal list [-l]\t|> Lists all current goals with progress")
+        print("\tgoal help [-h]\t|> Shows this message\n")
+
+    def category_index(self) -> dict[str, list[BudgetItem]]:
+        '''
+        Budget items and recurring occurrences grouped by category,
+        built once and kept up to date on add
+        '''
+        if self._category_index is None:
+            self._category_index = {}
+            for item in itertools.chain(self.items, self.recurring_items()):
+                self._category_index.setdefault(item.category, []).append(item)
+        return self._category_index
+
+    @register_command("category", "add", "-a")
+    def _category_add(self, args: list[str]):
+        name = clean_field(args[0]) if args else ""
+        if name:
+            if name.find("-") != -1:
+                print(color("Only strings can be added to categries not flags. ", "RED"))
+                return
+
+            if name in self.categories:
+                return
+            self.categories[name] = None
+            self.storage.add_category(self.username, name)
+            self.dirty = True
+        print(list(self.categories))
+
+    @register_command("category", "list", "-l")
+    def _category_list(self, _args: list[str]):
+        index = self.category_index()
+        try:
+            rows = [
+                [cat, str(len(index.get(cat, []))), str(Money(sum(item_value(item) for item in index.get(cat, []))))]
+                for cat in self.categories
+            ]
+        except ValueError as e:
+            print(color(str(e), "RED"))
+            return
+        print(color("> Categories", "BLUE"))
+        print(create_table(["Category", "Items", "Total"], rows))
+
+    @register_command("category", "show", "-s")
+    def _category_show(self, args: list[str]):
+        if not args:
+            print(color("Usage: category show 'name'", "RED"))
+            return
+        items = sorted(self.category_index().get(args[0], []), key=lambda item: item.date)
+        print(color(f"> {args[0]} ({len(items)} items)", "BLUE"))
+        print(create_table(
+            ["Date", "Type", "Amount"],
+            [[str(item.date), item.type, item.amount_text()] for item in items]
+        ))
+
+    @register_command("category", "help", "-h")
+    def _category_help(self, _args: list[str]):
+        print(color("\n~ Category Help ~\n", "CYAN"))
+        print("\tcategory add 'name'\t--> Creates new category")
+        print("\tcategory list [-l]\t|> Lists all current categories with item counts and totals")
+        print("\tcategory show [-s] 'name'\t|> Lists the budget items in a category")
+        print("\tcategory help [-h]\t|> Shows this message\n")
+
+COMMAND_ACTIONS = {action for action, _ in COMMANDS}
+
+# --------------------------------------------------------------
+# Multi-session server
+# --------------------------------------------------------------
+class ThreadStdout(io.TextIOBase):
+    '''
+    Stand-in for sys.stdout that sends each thread's prints to its own
+    stream, so command output reaches the right client.
+    '''
+
+    def __init__(self, default: IO[str]) -> None:
+        super().__init__()
+        self.default = default
+        self.local = threading.local()
+
+    def write(self, s: str) -> int: # pylint: disable=C0103:invalid-name
+        return getattr(self.local, "stream", self.default).write(s)
+
+    def flush(self) -> None:
+        getattr(self.local, "stream", self.default).flush()
+
+    @contextlib.contextmanager
+    def to_default(self) -> Iterator[None]:
+        '''
+        Send this thread's prints to the default stream for a while
+        '''
+        stream = getattr(self.local, "stream", None)
+        self.local.stream = self.default
+        try:
+            yield
+        finally:
+            if stream is None:
+                del self.local.stream
+            else:
+                self.local.stream = stream
+
+class UserCache:
+    '''
+    Shared cache of logged in users for the server.
+    Each entry carries a lock so one account's commands run one at a time,
+    and idle users are saved and evicted least recently used first.
+    The cache lock only guards the bookkeeping, loading and saving a user
+    happen under that user's own lock so other accounts are never held up.
+    '''
+
+    def __init__(self, max_size: int = SERVER_CACHE_SIZE) -> None:
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.users: OrderedDict[str, User] = OrderedDict()
+        self.user_locks: dict[str, threading.Lock] = {}
+        self.sessions: dict[str, int] = {}
+
+    def acquire(self, username: str, password: str) -> User | None:
+        '''
+        Log in and return the cached User, loading it on a miss.
+
+        :param username: Client username
+        :type username: String
+        :param password: Client password
+        :type password: String
+        :returns: User or None if the login is invalid
+        '''
+        if try_login(username, password) != State.SUCCESS:
+            return None
+
+        # Count the session first so the entry is not evicted or forgotten while it loads
+        with self.lock:
+            self.sessions[username] = self.sessions.get(username, 0) + 1
+            lock = self.user_locks.setdefault(username, threading.Lock())
+
+        try:
+            # Waits for an eviction of the same user to finish saving
+            with lock:
+                if username not in self.users:
+                    user = User(username, password)
+                    with self.lock:
+                        self.users[username] = user
+        except BaseException:
+            self.release(username)
+            raise
+
+        with self.lock:
+            user = self.users[username]
+            self.users.move_to_end(username)
+            dropped = self._evict()
+        self._close(dropped)
+        return user
+
+    def release(self, username: str) -> None:
+        '''
+        End one session of a user, the user stays cached until evicted
+        '''
+        with self.lock:
+            self.sessions[username] -= 1
+            self._forget(username)
+            dropped = self._evict()
+        self._close(dropped)
+
+    def user_lock(self, username: str) -> threading.Lock:
+        '''
+        Lock that serializes commands for one user
+        '''
+        return self.user_locks[username]
+
+    def _evict(self) -> list[tuple[str, User, threading.Lock]]:
+        # Called with the cache lock held, the users are saved by _close after it is released
+        dropped = []
+        idle = [name for name in self.users if self.sessions.get(name, 0) == 0]
+        while len(self.users) > self.max_size and idle:
+            name = idle.pop(0)
+            lock = self.user_locks[name]
+            # Held by close() right now, leave it to that
+            if not lock.acquire(blocking=False):
+                continue
+            dropped.append((name, self.users.pop(name), lock))
+        return dropped
+
+    def _close(self, dropped: list[tuple[str, User, threading.Lock]]) -> None:
+        for name, user, lock in dropped:
+            try:
+                # The evicted user is not this thread's client, keep its logout off their socket
+                with sys.stdout.to_default() if isinstance(sys.stdout, ThreadStdout) else contextlib.nullcontext():
+                    user.close()
+            finally:
+                lock.release()
+                with self.lock:
+                    self._forget(name)
+
+    def _forget(self, username: str) -> None:
+        # Drop the bookkeeping of a user that is neither loaded, in use nor being saved
+        lock = self.user_locks.get(username)
+        if self.sessions.get(username, 0) == 0 and username not in self.users and lock and not lock.locked():
+            self.sessions.pop(username, None)
+            del self.user_locks[username]
+
+    def close(self) -> None:
+        '''
+        Save and release every cached user
+        '''
+        with self.lock:
+            names = list(self.users)
+        for name in names:
+            with self.lock:
+                lock = self.user_locks.get(name)
+            if lock is None:
+                continue
+            with lock:
+                with self.lock:
+                    user = self.users.pop(name, None)
+                if user is not None:
+                    user.close()
+            with self.lock:
+                self._forget(name)
+
+class SessionHandler(socketserver.StreamRequestHandler):
+    '''
+    One client connection. Speaks the same commands as the REPL,
+    plus "login username password" and "logout".
+    '''
+
+    server: "FinancerServer"
+
+    def handle(self) -> None:
+        out = io.TextIOWrapper(self.wfile, encoding="utf-8", write_through=True)
+        sys.stdout.local.stream = out # type: ignore
+        cache = self.server.cache
+        username = None
+
+        try:
+            print("Financer server, login with: login username password")
+            for raw in self.rfile:
+                line = raw.decode("utf-8").strip()
+                if not line:
+                    continue
+                if line in ["exit", "quit"]:
+                    break
+
+                if username is None:
+                    match line.split(" "):
+                        case ["login" | "l", usrnm, pswrd]:
+                            try:
+                                if cache.acquire(usrnm, pswrd) is None:
+                                    print(color("Unable to find login information. ", "RED"))
+                                    continue
+                            except (AccountLockedError, SnapshotError) as e:
+                                print(color(str(e), "RED"))
+                                continue
+                            username = usrnm
+                            print(f"Logged in as {color(username, "BLUE")}")
+                        case _:
+                            print("Login first: login username password")
+                    continue
+
+                if line in ["x", "logout", "out"]:
+                    cache.release(username)
+                    username = None
+                    print(color("Logged out.", "GREEN"))
+                    continue
+
+                with cache.user_lock(username):
+                    cache.users[username].command(line)
+        finally:
+            if username is not None:
+                cache.release(username)
+            del sys.stdout.local.stream # type: ignore
+
+class FinancerServer(socketserver.ThreadingTCPServer):
+    '''
+    Threaded TCP server sharing one UserCache between all sessions
+    '''
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple[str, int], cache_size: int = SERVER_CACHE_SIZE) -> None:
+        super().__init__(address, SessionHandler)
+        self.cache = UserCache(cache_size)
+
+def serve(host: str = SERVER_HOST, port: int = SERVER_PORT, cache_size: int = SERVER_CACHE_SIZE) -> None:
+    '''
+    Run Financer as a multi-session server until interrupted
+    '''
+    if not isinstance(sys.stdout, ThreadStdout):
+        sys.stdout = ThreadStdout(sys.stdout)
+
+    with FinancerServer((host, port), cache_size) as server:
+        print(color(f"Serving Financer on {host}:{port}", "GREEN"))
+        try:
+            server.serve_forever()
+        finally:
+            server.cache.close()
 
 @error_boundary(err_msg="Failed to login.")
 def try_login(username: str, password: str) -> State:
@@ -324,14 +2379,7 @@ def try_login(username: str, password: str) -> State:
     :returns: Login successful state
     '''
 
-    # Try loging in
-    with open(LOGIN_FILE, 'r', encoding="utf-8") as file:
-        for login in file:
-            usr, pswrd = login.strip().split(",")
-            if username == usr and password == str(pswrd):
-                return State.SUCCESS
-
-    return State.FAIL
+    return State.SUCCESS if get_storage().check_login(username, password) else State.FAIL
 
 @error_boundary(err_msg="Failed to create new login.")
 def new_login(username: str, password: str) -> State:
@@ -351,11 +2399,7 @@ def new_login(username: str, password: str) -> State:
         return State.FAIL
 
     # Create login
-    with open(LOGIN_FILE, 'a', encoding="utf-8") as logins:
-        logins.write(f"{username},{password}\n")
-        return State.SUCCESS
-
-    return State.FAIL
+    return State.SUCCESS if get_storage().create_login(username, password) else State.FAIL
 
 def show_help() -> None:
     '''
@@ -369,8 +2413,15 @@ def show_help() -> None:
 
         {color("~ Account (must be logged in) ~","BLUE")}
     logout -> "out" "x" "logout"
-    add (expense | income) -> Adds float to specified section
-    set (budget | expenses | income) -> Overwrite specified section
+    budget add (expense | income) category amount -> Adds an item for today
+    budget import file [--category name] -> Imports a CSV/OFX bank statement
+    budget show [--from date] [--to date] [--last 30d] -> Lists budget items
+    budget report [--by category|type|day|week|month] [--from date] [--to date] [--last 30d] [--running] -> Totals and balance
+    budget export [file] -> Writes the ledger in the text format
+    category (add | list | show | help) -> Manage categories
+    goal (add | list | help) -> Manage and track goals
+    recurring (add | list | help) -> Repeating items such as rent or salary
+    currency (list | help) -> Exchange rates used to convert foreign currency items
         ''')
 
 @error_boundary(err_msg="Failed to create new database")
@@ -381,23 +2432,8 @@ def new_data(username: str, password: str) -> State:
 
     # TODO: Add try_login boundrary first to check for duplicates
 
-    try:
-        with open(DATA_FILE_PREFIX + username + ".txt", 'x', encoding="utf-8"):
-            print("New file created.")
-        print("Created new file for user.")
-    except FileExistsError:
-        print("File already exists.")
-        return State.SUCCESS
-
-
-    # Set password
-    with open(DATA_FILE_PREFIX + username + ".txt", 'a', encoding="utf-8") as data:
-        data.write(f"{username},{password}\n")
-        data.writelines([default + "\n" for default in DEFAULT_DATA])
-
-        return State.SUCCESS
-
-    return State.FAIL
+    get_storage().create_data(username, password)
+    return State.SUCCESS
 
 def main() -> None:
     '''Main entry'''
@@ -414,8 +2450,7 @@ def main() -> None:
             user = users[login_info]
             # Handle logout
             if user_input in ["x", "logout", "out"]:
-                del user
-                users.pop(login_info)
+                users.pop(login_info).close()
                 login_info = None
                 continue
 
@@ -436,9 +2471,13 @@ def main() -> None:
                 pswrd = input("Enter password: ")
 
                 if try_login(usrnm, pswrd) == State.SUCCESS:
+                    try:
+                        # Create new user
+                        users[usrnm] = User(usrnm,pswrd)
+                    except (AccountLockedError, SnapshotError) as e:
+                        print(color(str(e), "RED"))
+                        continue
                     login_info = usrnm
-                    # Create new user
-                    users[login_info] = User(usrnm,pswrd)
                 else:
                     print(color("Unable to find login information. ", "RED"))
 
@@ -460,9 +2499,121 @@ def main() -> None:
             case _:
                 pass
 
+# --------------------------------------------------------------
+# Batch mode
+# --------------------------------------------------------------
+def run_batch(user: User, lines: Iterable[str]) -> tuple[int, int]:
+    '''
+    Apply a stream of commands to a user. Consecutive "budget add" lines
+    are parsed straight into BudgetItems and appended in bulk, anything
+    else goes through User.command in order.
+
+    :param user: Logged in user
+    :type user: User
+    :param lines: Command lines
+    :type lines: Iterable[str]
+    :returns: Tuple of (applied, failed) line counts
+    '''
+    applied = failed = 0
+    pending: list[BudgetItem] = []
+
+    for number, line in enumerate(lines, 1):
+        try:
+            tokens = tokenize(line)
+        except ValueError as e:
+            print(color(f"line {number}: {e}", "RED"), file=sys.stderr)
+            failed += 1
+            continue
+        if not tokens or tokens[0].startswith("#"):
+            continue
+
+        if tokens[:2] in (["budget", "add"], ["budget", "-a"]):
+            try:
+                pending.append(budget_add_item(tokens[2:]))
+            except ValueError as e:
+                print(color(f"line {number}: {e}", "RED"), file=sys.stderr)
+                failed += 1
+                continue
+        else:
+            user.add_items(pending)
+            pending.clear()
+            user.command(line)
+        applied += 1
+
+    user.add_items(pending)
+    return applied, failed
+
+def batch(source: str, username: str | None, password: str | None) -> int:
+    '''
+    Non-interactive entry: log in once, stream commands from a file
+    (or stdin for "-"), save once and report throughput.
+
+    :param source: Command file path, "-" for stdin
+    :type source: String
+    :param username: Username, falls back to $FINANCER_USER
+    :type username: String | None
+    :param password: Password, falls back to $FINANCER_PASSWORD
+    :type password: String | None
+    :returns: Process exit code
+    '''
+    username = username or os.environ.get("FINANCER_USER")
+    password = password or os.environ.get("FINANCER_PASSWORD")
+    if not username or not password or try_login(username, password) != State.SUCCESS:
+        print(color("Unable to find login information. ", "RED"), file=sys.stderr)
+        return 1
+
+    try:
+        user = User(username, password)
+    except (AccountLockedError, SnapshotError) as e:
+        print(color(str(e), "RED"), file=sys.stderr)
+        return 1
+
+    start = time.perf_counter()
+    if source == "-":
+        applied, failed = run_batch(user, sys.stdin)
+    else:
+        with open(source, 'r', encoding="utf-8") as file:
+            applied, failed = run_batch(user, file)
+    user.close()
+    elapsed = time.perf_counter() - start
+
+    rate = applied / elapsed if elapsed > 0 else 0
+    print(f"Applied {applied} rows ({failed} failed) in {elapsed:.2f}s -> {rate:,.0f} rows/sec", file=sys.stderr)
+    return 0 if failed == 0 else 2
+
+def parse_args() -> argparse.Namespace:
+    '''
+    Command line options for starting Financer
+    '''
+    parser = argparse.ArgumentParser(description="Financer cli")
+    parser.add_argument("--serve", action="store_true", help="run as a multi-session server")
+    parser.add_argument("--host", default=SERVER_HOST, help="server host")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="server port")
+    parser.add_argument("--cache-size", type=int, default=SERVER_CACHE_SIZE, help="users kept loaded by the server")
+    parser.add_argument("--storage", choices=["text", "sqlite"], default=STORAGE_BACKEND, help="where logins and data are kept")
+    parser.add_argument("--snapshot", action="store_true", help="save text storage as binary snapshots")
+    parser.add_argument("--migrate-sqlite", action="store_true", help=f"copy text data into {DATABASE_FILE} and exit")
+    parser.add_argument("--batch", metavar="FILE", help="run commands from FILE (\"-\" for stdin) without prompting")
+    parser.add_argument("--user", help="username for batch mode (default: $FINANCER_USER)")
+    parser.add_argument("--password", help="password for batch mode (default: $FINANCER_PASSWORD)")
+    return parser.parse_args()
+
 if __name__ == "__main__":
+    args = parse_args()
+    signal.signal(signal.SIGTERM, exit_on_signal)
+    if hasattr(signal, "SIGHUP"):
+        signal.signal(signal.SIGHUP, exit_on_signal)
+    STORAGE_BACKEND = args.storage
+    SNAPSHOT_ENABLED = args.snapshot
     try:
-        main()
+        if args.migrate_sqlite:
+            print(f"Migrated {migrate_to_sqlite()} users to {DATABASE_FILE}")
+        elif args.batch:
+            sys.exit(batch(args.batch, args.user, args.password))
+        elif args.serve:
+            serve(args.host, args.port, args.cache_size)
+        else:
+            main()
     except KeyboardInterrupt:
         print(color("\n\nKeyboard interrupt exit...", "RED"))
     finally:
@@ -0,0 +1,749 @@
+#!/usr/bin/python3
+import contextlib
+import io
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+import cps109_a1
+
+class FinancerTestCase(unittest.TestCase):
+    '''
+    Runs each test in an empty temporary directory with output silenced
+    '''
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.out = io.StringIO()
+        self._quiet = contextlib.redirect_stdout(self.out)
+        self._quiet.__enter__()
+        cps109_a1.get_storage.cache_clear()
+
+    def tearDown(self):
+        cps109_a1.close_all_users()
+        cps109_a1.get_storage.cache_clear()
+        self._quiet.__exit__(None, None, None)
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def new_user(self, username="test", password="pw", **kwargs):
+        ''' create an account and log into it '''
+        cps109_a1.new_login(username, password)
+        cps109_a1.new_data(username, password)
+        return cps109_a1.User(username, password, **kwargs)
+
+    def run_command(self, user, cmd):
+        ''' run a command and return what it printed '''
+        start = len(self.out.getvalue())
+        user.command(cmd)
+        return self.out.getvalue()[start:]
+
+
+
+class TestSnapshot(FinancerTestCase):
+    '''
+    Unit Testing for the binary snapshot format
+    '''
+
+    def test_round_trip(self):
+        ''' test_round_trip '''
+        items = [
+            cps109_a1.BudgetItem("2024-01-31", "expense", "rent", "1500"),
+            cps109_a1.BudgetItem("2024-02-01", "income", "pay", "12.34 USD", "march, part 1"),
+            cps109_a1.BudgetItem("2023-12-25", "expense", "gifts", "-0.05", "ünïcode"),
+        ]
+        sections = {"Categories": ["rent", "pay"], "Goals": ["limit,rent,2000.00"], "Recurring": []}
+        cps109_a1.write_snapshot("test.snap", items, sections)
+        ledger, loaded = cps109_a1.read_snapshot("test.snap")
+        self.assertEqual(len(ledger), 3)
+        self.assertEqual([str(item) for item in ledger], [str(item) for item in items])
+        self.assertEqual(ledger[-1].description, "ünïcode")
+        # Descriptions are read from the text block on access, not the string table
+        self.assertNotIn("ünïcode", ledger._strings)
+        self.assertEqual(ledger[1].currency, "USD")
+        self.assertEqual(loaded, sections)
+        ledger.close()
+    def test_bad_file(self):
+        ''' test_bad_file '''
+        with open("bad.snap", 'wb') as file:
+            file.write(b"nope" + bytes(64))
+        self.assertRaises(ValueError, cps109_a1.read_snapshot, "bad.snap")
+    def test_user_round_trip(self):
+        ''' test_user_round_trip '''
+        with self.new_user(snapshot=True) as user:
+            user.command("budget add expense food 5")
+            user.command("category add food")
+        self.assertTrue(os.path.exists(cps109_a1.snapshot_path("test")))
+        with cps109_a1.User("test", "pw", snapshot=True) as user:
+            self.assertEqual([item.amount for item in user.items], [500])
+            self.assertEqual(list(user.categories), ["food"])
+    def test_unreadable_snapshot(self):
+        ''' test_unreadable_snapshot '''
+        with self.new_user() as user:
+            user.command("budget add expense food 5")
+        with open(cps109_a1.snapshot_path("test"), 'wb') as file:
+            file.write(b"FNS1" + bytes(8))
+        self.assertRaises(cps109_a1.SnapshotError, cps109_a1.User, "test", "pw", snapshot=True)
+        with cps109_a1.User("test", "pw", snapshot=False) as user:
+            self.assertEqual(len(user.items), 1)
+
+
+
+class TestBudgetReport(unittest.TestCase):
+    '''
+    Unit Testing for BudgetReport
+    '''
+
+    def setUp(self):
+        self.report = cps109_a1.BudgetReport([
+            cps109_a1.BudgetItem("2024-01-05", "income", "pay", "100"),
+            cps109_a1.BudgetItem("2024-02-01", "expense", "food", "30"),
+            cps109_a1.BudgetItem("2024-01-20", "expense", "food", "10"),
+            cps109_a1.BudgetItem("2024-02-01", "expense", "rent", "50"),
+        ])
+
+    def test_totals(self):
+        ''' test_totals '''
+        self.assertEqual(self.report.totals("category"), {"pay": 10000, "food": -4000, "rent": -5000})
+        self.assertEqual(self.report.totals("month", date(2024, 1, 10)), {"2024-01": -1000, "2024-02": -8000})
+        self.assertEqual(self.report.totals("category", end=date(2024, 1, 31)), {"pay": 10000, "food": -1000})
+        self.assertEqual(self.report.totals("type", date(2025, 1, 1)), {})
+    def test_range_total(self):
+        ''' test_range_total '''
+        self.assertEqual(self.report.range_total(), 1000)
+        self.assertEqual(self.report.range_total(date(2024, 1, 6), date(2024, 1, 31)), -1000)
+        self.assertEqual(self.report.range_total(category="food", start=date(2024, 2, 1)), -3000)
+        self.assertEqual(self.report.range_total(category="none"), 0)
+    def test_running_balance(self):
+        ''' test_running_balance '''
+        self.assertEqual(self.report.running_balance(), [(date(2024, 1, 5), 10000), (date(2024, 1, 20), 9000), (date(2024, 2, 1), 1000)])
+        self.assertEqual(self.report.running_balance(date(2024, 1, 6), date(2024, 1, 31)), [(date(2024, 1, 20), 9000)])
+
+
+
+class TestBudgetReportCommand(FinancerTestCase):
+    '''
+    Unit Testing for budget report
+    '''
+
+    def test_range_table(self):
+        ''' test_range_table '''
+        with self.new_user() as user:
+            user.add_items([
+                cps109_a1.BudgetItem("2024-01-05", "income", "pay", "100"),
+                cps109_a1.BudgetItem("2024-02-01", "expense", "food", "30"),
+            ])
+            output = self.run_command(user, "budget report --by category --from 2024-02-01 --to 2024-02-28 --running")
+            self.assertIn("2024-02-01 -> 2024-02-28", output)
+            self.assertIn("| food ", output)
+            self.assertNotIn("| pay ", output)
+            self.assertIn("| 2024-02-01 | 70.00 ", output)
+            self.assertIn("all time", self.run_command(user, "budget report"))
+            self.assertIn("can only be grouped", self.run_command(user, "budget report --by year"))
+
+
+
+class TestMoney(unittest.TestCase):
+    '''
+    Unit Testing for Money.parse
+    '''
+
+    def test_parse(self):
+        ''' test_parse '''
+        self.assertEqual(cps109_a1.Money.parse("12"), 1200)
+        self.assertEqual(cps109_a1.Money.parse("-3.5"), -350)
+        self.assertEqual(cps109_a1.Money.parse("+1200.99"), 120099)
+        self.assertEqual(cps109_a1.Money.parse(" .5 "), 50)
+        self.assertEqual(cps109_a1.Money.parse("7."), 700)
+    def test_str(self):
+        ''' test_str '''
+        self.assertEqual(str(cps109_a1.Money(-5)), "-0.05")
+        self.assertEqual(str(cps109_a1.Money.parse("1200.9")), "1200.90")
+    def test_parse_invalid(self):
+        ''' test_parse_invalid '''
+        for text in ["", "-", ".", "abc", "1.234", "1.2.3", "1,000", "1e5", "$5", "+-5", "--5", "-+5", "++5", "5-", "- 5"]:
+            with self.subTest(text=text):
+                self.assertRaises(ValueError, cps109_a1.Money.parse, text)
+
+
+
+class TestUserCache(FinancerTestCase):
+    '''
+    Unit Testing for the server UserCache
+    '''
+
+    def test_eviction_saves(self):
+        ''' test_eviction_saves '''
+        for name in ["a", "b"]:
+            self.new_user(name).close()
+        cache = cps109_a1.UserCache(max_size=1)
+        cache.acquire("a", "pw").command("budget add expense food 5")
+        cache.release("a")
+        self.assertIsNotNone(cache.acquire("b", "pw"))
+        self.assertEqual(list(cache.users), ["b"])
+        self.assertNotIn("a", cache.user_locks)
+        self.assertEqual(len(cache.acquire("a", "pw").items), 1)
+        cache.close()
+        self.assertEqual(cache.users, {})
+    def test_load_outside_cache_lock(self):
+        ''' test_load_outside_cache_lock '''
+        self.new_user().close()
+        cache = cps109_a1.UserCache()
+        user_class = cps109_a1.User
+
+        def load(*args):
+            self.assertFalse(cache.lock.locked())
+            return user_class(*args)
+
+        cps109_a1.User = load
+        try:
+            cache.acquire("test", "pw")
+        finally:
+            cps109_a1.User = user_class
+        cache.close()
+    def test_bad_password(self):
+        ''' test_bad_password '''
+        self.new_user().close()
+        cache = cps109_a1.UserCache()
+        self.assertIsNone(cache.acquire("test", "wrong"))
+        self.assertEqual(cache.user_locks, {})
+    def test_eviction_output(self):
+        ''' test_eviction_output '''
+        for name in ["a", "b"]:
+            self.new_user(name).close()
+        server, client = io.StringIO(), io.StringIO()
+        stdout = cps109_a1.ThreadStdout(server)
+        stdout.local.stream = client
+        cache = cps109_a1.UserCache(max_size=1)
+        cache.acquire("a", "pw")
+        cache.release("a")
+        with contextlib.redirect_stdout(stdout):
+            cache.acquire("b", "pw")
+        self.assertNotIn("Logging out", client.getvalue())
+        self.assertIn("Logging out", server.getvalue())
+        self.assertIs(stdout.local.stream, client)
+        cache.close()
+
+
+
+class TestTokenize(unittest.TestCase):
+    '''
+    Unit Testing for tokenize
+    '''
+
+    def test_plain(self):
+        ''' test_plain '''
+        self.assertEqual(cps109_a1.tokenize("  budget   add expense food 5 "), ["budget", "add", "expense", "food", "5"])
+        self.assertEqual(cps109_a1.tokenize(""), [])
+    def test_quotes(self):
+        ''' test_quotes '''
+        self.assertEqual(cps109_a1.tokenize('category add "fun stuff"'), ["category", "add", "fun stuff"])
+        self.assertEqual(cps109_a1.tokenize("goal add 'a b' \"c d\""), ["goal", "add", "a b", "c d"])
+        self.assertEqual(cps109_a1.tokenize('x ""'), ["x", ""])
+        self.assertEqual(cps109_a1.tokenize('a"b c"d "it\'s"'), ["ab cd", "it's"])
+    def test_escapes(self):
+        ''' test_escapes '''
+        self.assertEqual(cps109_a1.tokenize(r'say \"hi\"'), ["say", '"hi"'])
+        self.assertEqual(cps109_a1.tokenize(r"fun\ stuff"), ["fun stuff"])
+        self.assertEqual(cps109_a1.tokenize(r"a\\b"), ["a\\b"])
+        self.assertEqual(cps109_a1.tokenize(r"budget import C:\Users\me\stmt.csv"), ["budget", "import", r"C:\Users\me\stmt.csv"])
+        self.assertEqual(cps109_a1.tokenize(r'"C:\new dir\x.csv" trailing\\'), [r"C:\new dir\x.csv", "trailing\\"])
+    def test_invalid(self):
+        ''' test_invalid '''
+        self.assertRaises(ValueError, cps109_a1.tokenize, 'category add "fun')
+
+
+
+class TestBatch(FinancerTestCase):
+    '''
+    Unit Testing for batch mode
+    '''
+
+    LINES = [
+        "budget add expense food 5", "# comment", "", "budget add income pay 100", "budget add expense food abc",
+        'budget add expense "food', "category add food", "budget add expense rent 900",
+    ]
+
+    def test_counts_and_bulk_append(self):
+        ''' test_counts_and_bulk_append '''
+        with self.new_user() as user:
+            batches = []
+            add_items = user.add_items
+            user.add_items = lambda items: batches.append(len(items)) or add_items(items)
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(cps109_a1.run_batch(user, self.LINES), (4, 2))
+            # The two adds before "category add" are flushed together, before it runs
+            self.assertEqual([size for size in batches if size], [2, 1])
+            self.assertEqual([item.category for item in user.items], ["food", "pay", "rent"])
+            self.assertEqual(list(user.categories), ["food"])
+    def test_matches_command(self):
+        ''' test_matches_command '''
+        lines = ["budget add expense food 5 CAD extra", "budget add expense food", "budget -a income pay 1.5"]
+        with self.new_user() as user:
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(cps109_a1.run_batch(user, lines), (2, 1))
+            for line in lines:
+                user.command(line)
+            batched, typed = user.items[:2], user.items[2:]
+            self.assertEqual([str(item) for item in batched], [str(item) for item in typed])
+    def test_single_save(self):
+        ''' test_single_save '''
+        self.new_user().close()
+        with open("commands.txt", 'w', encoding="utf-8") as file:
+            file.write("\n".join(self.LINES))
+        saves = []
+        save = cps109_a1.TextStorage.save
+        cps109_a1.TextStorage.save = lambda storage, user: saves.append(user.username) or save(storage, user)
+        try:
+            with contextlib.redirect_stderr(io.StringIO()):
+                self.assertEqual(cps109_a1.batch("commands.txt", "test", "pw"), 2)
+                self.assertEqual(cps109_a1.batch("commands.txt", "test", "wrong"), 1)
+        finally:
+            cps109_a1.TextStorage.save = save
+        self.assertEqual(saves, ["test"])
+        with cps109_a1.User("test", "pw") as user:
+            self.assertEqual(len(user.items), 3)
+
+
+
+class TestImport(FinancerTestCase):
+    '''
+    Unit Testing for statement import de-duplication
+    '''
+
+    STATEMENT = "Date,Description,Amount\n2024-01-02,Coffee,-3.50\n2024-01-02,Coffee,-3.50\n2024-01-03,Pay,100\n"
+
+    def write(self, text, path="stmt.csv"):
+        ''' write a statement file '''
+        with open(path, 'w', encoding="utf-8") as file:
+            file.write(text)
+        return path
+
+    def test_reimport_skips_rows(self):
+        ''' test_reimport_skips_rows '''
+        path = self.write(self.STATEMENT)
+        with self.new_user() as user:
+            self.assertEqual(user.import_items(cps109_a1.read_statement(path)), 3)
+            self.assertEqual(user.import_items(cps109_a1.read_statement(path)), 0)
+            self.assertEqual(len(user.items), 3)
+    def test_overlapping_statement(self):
+        ''' test_overlapping_statement '''
+        with self.new_user() as user:
+            user.import_items(cps109_a1.read_statement(self.write(self.STATEMENT)))
+            more = self.STATEMENT + "2024-01-02,Coffee,-3.50\n2024-01-04,Rent,-900\n"
+            # The third identical coffee is new, the first two were already imported
+            self.assertEqual(user.import_items(cps109_a1.read_statement(self.write(more))), 2)
+            self.assertEqual(len(user.items), 5)
+    def test_ragged_rows(self):
+        ''' test_ragged_rows '''
+        path = self.write("Date,Description,Amount\n2024-01-02,Coffee,-3.50,extra,fields\n2024-01-03,Pay,100\n")
+        self.assertEqual([(item.type, str(item.amount)) for item in cps109_a1.read_statement(path)], [("expense", "3.50"), ("income", "100.00")])
+    def test_commas_round_trip(self):
+        ''' test_commas_round_trip '''
+        path = self.write('Date,Description,Amount,Category\n2024-01-02,"Cafe, Main St",-3.50,"Food, Dining"\n2024-01-03,Pay,100,\n')
+        with self.new_user() as user:
+            user.command(f"budget import {path}")
+            user.command('budget add expense "food, dining" 5')
+            user.command('budget add "in,come" ",,," 5')
+            user.command('category add "a,b"')
+            user.command('goal add limit "food, dining" 20')
+        with cps109_a1.User("test", "pw") as user:
+            self.assertEqual([item.category for item in user.items], ["Food Dining", "imported", "food dining"])
+            self.assertEqual(user.items[0].description, "Cafe Main St")
+            self.assertEqual(list(user.categories), ["a b"])
+            self.assertEqual(user.goals[0].category, "food dining")
+    def test_reimport_after_reload(self):
+        ''' test_reimport_after_reload '''
+        path = self.write(self.STATEMENT)
+        with self.new_user() as user:
+            user.import_items(cps109_a1.read_statement(path))
+        with cps109_a1.User("test", "pw") as user:
+            self.assertEqual(user.import_items(cps109_a1.read_statement(path)), 0)
+
+
+
+class TestGoals(FinancerTestCase):
+    '''
+    Unit Testing for tracked goals
+    '''
+
+    def test_save_goal(self):
+        ''' test_save_goal '''
+        goal = cps109_a1.SaveGoal(cps109_a1.Money(10000), date(2024, 1, 1), date(2024, 6, 30))
+        for item in [
+            cps109_a1.BudgetItem("2023-12-31", "income", "pay", "500"),
+            cps109_a1.BudgetItem("2024-02-01", "income", "pay", "80"),
+            cps109_a1.BudgetItem("2024-03-01", "expense", "food", "20"),
+            cps109_a1.BudgetItem("2024-07-01", "income", "pay", "500"),
+        ]:
+            goal.update(item)
+        self.assertEqual(goal.saved, 6000)
+        self.assertEqual(goal.status(), "missed (60.00 / 100.00)")
+        goal.update(cps109_a1.BudgetItem("2024-06-30", "income", "pay", "40"))
+        self.assertEqual(goal.status(), "reached (100.00)")
+        goal.reset()
+        self.assertEqual(goal.saved, 0)
+    def test_limit_goal(self):
+        ''' test_limit_goal '''
+        goal = cps109_a1.LimitGoal("food", cps109_a1.Money(1000))
+        for item in [
+            cps109_a1.BudgetItem("2024-01-02", "expense", "food", "8"),
+            cps109_a1.BudgetItem("2024-01-20", "expense", "food", "3"),
+            cps109_a1.BudgetItem("2024-01-21", "income", "food", "50"),
+            cps109_a1.BudgetItem("2024-02-02", "expense", "food", "9"),
+        ]:
+            goal.update(item)
+        self.assertEqual(goal.monthly, {"2024-01": 1100, "2024-02": 900})
+        self.assertTrue(goal.status().endswith("1 month(s) over"))
+    def test_parse_goal(self):
+        ''' test_parse_goal '''
+        for line in ["save,100.00,2024-01-01,2024-12-31", "limit,food,25.50", "Buy a house"]:
+            self.assertEqual(str(cps109_a1.parse_goal(line)), line)
+        self.assertEqual(type(cps109_a1.parse_goal("limit,food,lots")), cps109_a1.Goal)
+    def test_goal_commands(self):
+        ''' test_goal_commands '''
+        with self.new_user() as user:
+            user.command("goal add limit food 10")
+            user.command("goal add save 100 2999-01-01")
+            user.command("goal add limit food abc")
+            self.assertEqual(len(user.goals), 2)
+            self.assertIn("ok: 0.00 / 10.00 this month", self.run_command(user, "goal list"))
+            # Goals are indexed now, new items only update the goals they affect
+            user.command("budget add expense food 4")
+            user.command("budget add income pay 30")
+            user.command("budget add expense food 7")
+            output = self.run_command(user, "goal list")
+            self.assertIn("over: 11.00 / 10.00 this month, 1 month(s) over", output)
+            self.assertIn("19.00 / 100.00 (19%)", output)
+        with cps109_a1.User("test", "pw") as user:
+            self.assertIn("over: 11.00 / 10.00 this month", self.run_command(user, "goal list"))
+
+
+
+class TestStorage(unittest.TestCase):
+    '''
+    Unit Testing for the Storage interface
+    '''
+
+    def test_incomplete_backend(self):
+        ''' test_incomplete_backend '''
+        class LoginOnly(cps109_a1.Storage):
+            def check_login(self, username, password):
+                return True
+
+        self.assertRaises(TypeError, LoginOnly)
+        self.assertRaises(TypeError, cps109_a1.Storage)
+        self.assertIsInstance(cps109_a1.TextStorage(), cps109_a1.Storage)
+
+
+
+class TestSqliteMigration(FinancerTestCase):
+    '''
+    Unit Testing for migrate_to_sqlite
+    '''
+
+    def test_rerun_is_safe(self):
+        ''' test_rerun_is_safe '''
+        with self.new_user() as user:
+            user.command("budget add expense food 5")
+            user.command("category add food")
+            user.command("recurring add monthly expense rent 900 --from 2024-01-01")
+        self.assertEqual(cps109_a1.migrate_to_sqlite("test.db"), 1)
+        self.assertEqual(cps109_a1.migrate_to_sqlite("test.db"), 0)
+        conn = sqlite3.connect("test.db")
+        for table in ["logins", "items", "categories", "recurring"]:
+            self.assertEqual(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone(), (1,))
+        conn.close()
+        with cps109_a1.User("test", "pw", storage=cps109_a1.SqliteStorage("test.db")) as user:
+            self.assertEqual([str(item.amount) for item in user.items], ["5.00"])
+            self.assertEqual(len(user.recurring), 1)
+
+
+    def test_snapshot_data(self):
+        ''' test_snapshot_data '''
+        with self.new_user(snapshot=True) as user:
+            user.command("budget add expense food 5")
+            user.command("category add food")
+        self.assertEqual(cps109_a1.migrate_to_sqlite("test.db"), 1)
+        with cps109_a1.User("test", "pw", storage=cps109_a1.SqliteStorage("test.db")) as user:
+            self.assertEqual([str(item.amount) for item in user.items], ["5.00"])
+            self.assertEqual(list(user.categories), ["food"])
+    def test_skips_unloadable(self):
+        ''' test_skips_unloadable '''
+        with self.new_user() as user:
+            user.command("budget add expense food 5")
+        with open(cps109_a1.snapshot_path("test"), 'wb') as file:
+            file.write(b"FNS1" + bytes(8))
+        self.assertEqual(cps109_a1.migrate_to_sqlite("test.db"), 0)
+        os.remove(cps109_a1.snapshot_path("test"))
+        self.assertEqual(cps109_a1.migrate_to_sqlite("test.db"), 1)
+
+class TestDateIndex(unittest.TestCase):
+    '''
+    Unit Testing for DateIndex.between
+    '''
+
+    def test_between(self):
+        ''' test_between '''
+        days = ["2024-03-01", "2024-01-01", "2024-02-01", "2024-02-01", "2024-04-01"]
+        index = cps109_a1.DateIndex(cps109_a1.BudgetItem(day, "expense", "x", "1") for day in days)
+        self.assertEqual([str(i.date) for i in index.between(date(2024, 2, 1), date(2024, 3, 1))], ["2024-02-01", "2024-02-01", "2024-03-01"])
+        self.assertEqual(len(index.between()), 5)
+        self.assertEqual(len(index.between(end=date(2023, 12, 31))), 0)
+        self.assertEqual(len(index.between(start=date(2024, 3, 2))), 1)
+    def test_insert(self):
+        ''' test_insert '''
+        index = cps109_a1.DateIndex([])
+        for day in ["2024-03-01", "2024-01-01", "2024-02-01"]:
+            index.insert(cps109_a1.BudgetItem(day, "expense", "x", "1"))
+        self.assertEqual(index.dates, [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)])
+
+
+
+class TestRanges(FinancerTestCase):
+    '''
+    Unit Testing for parse_range and budget show ranges
+    '''
+
+    def test_parse_range(self):
+        ''' test_parse_range '''
+        self.assertEqual(
+            cps109_a1.parse_range(["--by", "month", "--from", "2024-01-01", "--to", "2024-02-01"]),
+            (date(2024, 1, 1), date(2024, 2, 1), ["--by", "month"])
+        )
+        self.assertEqual(cps109_a1.parse_range([]), (None, None, []))
+        for span, days in [("30d", 30), ("2w", 14), ("3m", 90), ("1y", 365)]:
+            self.assertEqual(cps109_a1.parse_range(["--last", span]), (cps109_a1.TODAY - timedelta(days=days), None, []))
+    def test_parse_range_invalid(self):
+        ''' test_parse_range_invalid '''
+        for options in [["--last", "30"], ["--last", "d"], ["--last", "30x"], ["--last", "-3d"], ["--last"], ["--from", "soon"], ["--to"]]:
+            with self.subTest(options=options):
+                self.assertRaises(ValueError, cps109_a1.parse_range, options)
+    def test_show_range(self):
+        ''' test_show_range '''
+        with self.new_user() as user:
+            user.add_items([
+                cps109_a1.BudgetItem("2024-03-10", "expense", "food", "5"),
+                cps109_a1.BudgetItem("2024-01-10", "expense", "food", "6"),
+            ])
+            user.command("recurring add monthly expense rent 900 --from 2024-01-31")
+            expected = ["2024-02-29", "2024-03-10", "2024-03-31"]
+            self.assertEqual([str(item.date) for item in user.items_between(date(2024, 2, 1), date(2024, 3, 31))], expected)
+            output = self.run_command(user, "budget show --from 2024-02-01 --to 2024-03-31")
+            self.assertEqual([line.split("|")[1].strip() for line in output.splitlines()[3:-1]], expected)
+            self.assertIn("Invalid span", self.run_command(user, "budget show --last 5q"))
+
+
+
+class TestShutdown(FinancerTestCase):
+    '''
+    Unit Testing for User.close and the exit flush
+    '''
+
+    def count_saves(self):
+        ''' patch TextStorage.save to record each call '''
+        saves = []
+        save = cps109_a1.TextStorage.save
+        cps109_a1.TextStorage.save = lambda storage, user: saves.append(user.username) or save(storage, user)
+        self.addCleanup(setattr, cps109_a1.TextStorage, "save", save)
+        return saves
+
+    def test_close_saves_when_dirty(self):
+        ''' test_close_saves_when_dirty '''
+        saves = self.count_saves()
+        user = self.new_user()
+        user.command("budget show")
+        user.close()
+        self.assertEqual(saves, [])
+        user = cps109_a1.User("test", "pw")
+        user.command("budget add expense food 5")
+        user.close()
+        user.close()
+        self.assertEqual(saves, ["test"])
+        self.assertNotIn(user, cps109_a1.OPEN_USERS)
+    def test_noop_leaves_clean(self):
+        ''' test_noop_leaves_clean '''
+        with open("stmt.csv", 'w', encoding="utf-8") as file:
+            file.write("Date,Description,Amount\n2024-01-02,Coffee,-3.50\n")
+        with self.new_user() as user:
+            user.import_items(cps109_a1.read_statement("stmt.csv"))
+            user.dirty = False
+            user.command("budget import stmt.csv")
+            user.command("budget show")
+            self.assertFalse(user.dirty)
+    @unittest.skipIf(cps109_a1.fcntl is None, "no file locks on this platform")
+    def test_lock_released(self):
+        ''' test_lock_released '''
+        user = self.new_user()
+        self.assertRaises(cps109_a1.AccountLockedError, cps109_a1.User, "test", "pw")
+        user.close()
+        with cps109_a1.User("test", "pw") as again:
+            self.assertFalse(again.closed)
+    def test_exit_flush(self):
+        ''' test_exit_flush '''
+        self.new_user().close()
+        script = (
+            "import os, signal, sys; sys.path.insert(0, sys.argv[1]); import cps109_a1\n"
+            "signal.signal(signal.SIGTERM, cps109_a1.exit_on_signal)\n"
+            "user = cps109_a1.User('test', 'pw')\n"
+            "user.command(f'budget add expense food {sys.argv[2]}')\n"
+            "if sys.argv[2] == '2': os.kill(os.getpid(), signal.SIGTERM)\n"
+        )
+        folder = os.path.dirname(os.path.abspath(cps109_a1.__file__))
+        for amount in ["1", "2"]:
+            subprocess.run([sys.executable, "-c", script, folder, amount], check=False, capture_output=True, timeout=60)
+        with cps109_a1.User("test", "pw") as user:
+            self.assertEqual([str(item.amount) for item in user.items], ["1.00", "2.00"])
+
+
+
+class TestRecurring(unittest.TestCase):
+    '''
+    Unit Testing for RecurringRule.occurrences
+    '''
+
+    def rule(self, freq, start, interval=1, until=None):
+        ''' build a rule '''
+        return cps109_a1.RecurringRule(freq, interval, date.fromisoformat(start), until and date.fromisoformat(until), "expense", "rent", cps109_a1.Money(100))
+
+    def test_month_end_clamping(self):
+        ''' test_month_end_clamping '''
+        rule = self.rule("monthly", "2024-01-31")
+        self.assertEqual(
+            list(rule.occurrences(date(2024, 1, 1), date(2024, 5, 31))),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)]
+        )
+    def test_leap_day_yearly(self):
+        ''' test_leap_day_yearly '''
+        rule = self.rule("yearly", "2024-02-29")
+        self.assertEqual(list(rule.occurrences(date(2025, 1, 1), date(2028, 12, 31))), [date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)])
+    def test_window_start(self):
+        ''' test_window_start '''
+        rule = self.rule("weekly", "2025-01-01", interval=2, until="2025-03-01")
+        self.assertEqual(list(rule.occurrences(date(2025, 1, 10), date(2030, 1, 1))), [date(2025, 1, 15), date(2025, 1, 29), date(2025, 2, 12), date(2025, 2, 26)])
+        self.assertEqual(list(self.rule("monthly", "2024-01-31").occurrences(date(2024, 3, 1), date(2024, 3, 30))), [])
+    def test_matches_brute_force(self):
+        ''' test_matches_brute_force '''
+        for freq in ["daily", "weekly", "monthly", "yearly"]:
+            rule = self.rule(freq, "2020-01-30", interval=3)
+            every = list(rule.occurrences(None, date(2030, 1, 1)))
+            for start in [date(2019, 5, 5), date(2020, 1, 30), date(2021, 7, 1), date(2024, 2, 29)]:
+                with self.subTest(freq=freq, start=start):
+                    self.assertEqual(list(rule.occurrences(start, date(2030, 1, 1))), [day for day in every if day >= start])
+    def test_parse_round_trip(self):
+        ''' test_parse_round_trip '''
+        line = "monthly,2,2024-01-31,2025-01-01,expense,rent,1500.00 USD,Main st"
+        self.assertEqual(str(cps109_a1.RecurringRule.parse(line)), line)
+        self.assertRaises(ValueError, self.rule, "hourly", "2024-01-01")
+
+
+
+class TestRecurringViews(FinancerTestCase):
+    '''
+    Unit Testing for recurring occurrences in goals and categories
+    '''
+
+    def test_commas_round_trip(self):
+        ''' test_commas_round_trip '''
+        with self.new_user() as user:
+            user.command('recurring add monthly "ex,pense" "a,b" 5 --from 2024-01-01 --note "x, y"')
+            user.command('recurring add monthly expense "," 5')
+            self.assertEqual(len(user.recurring), 1)
+        with cps109_a1.User("test", "pw") as user:
+            rule = user.recurring[0]
+            self.assertEqual((rule.type, rule.category, str(rule.amount), rule.description), ("ex pense", "a b", "5.00", "x y"))
+    def test_goals_and_categories(self):
+        ''' test_goals_and_categories '''
+        with self.new_user() as user:
+            user.command("goal add limit rent 100")
+            user.command("budget add expense rent 50")
+            self.assertEqual(len(user.category_index()["rent"]), 1)
+            user.command("recurring add monthly expense rent 900 --from 2024-01-31")
+            expected = len(user.recurring_items())
+            self.assertEqual(len(user.category_index()["rent"]), expected + 1)
+            user.goal_index()
+            self.assertEqual(user.goals[0].monthly["2024-02"], 90000)
+            user.command("goal add limit rent 5")
+            self.assertEqual(sum(user.goals[1].monthly.values()), 900 * 100 * expected + 5000)
+
+
+class TestCurrency(FinancerTestCase):
+    '''
+    Unit Testing for exchange rates
+    '''
+
+    def setUp(self):
+        super().setUp()
+        with open(cps109_a1.RATES_FILE, "w", encoding="utf-8") as file:
+            file.write("# date,currency,rate\n2024-01-01,USD,1.35\n2024-02-01,usd,1.4\n")
+        cps109_a1.get_rates.cache_clear()
+
+    def tearDown(self):
+        cps109_a1.get_rates.cache_clear()
+        super().tearDown()
+
+    def test_parse_rate(self):
+        ''' test_parse_rate '''
+        self.assertEqual(cps109_a1.parse_rate("1.3512"), 1_351_200)
+        self.assertEqual(cps109_a1.parse_rate(" 2 "), 2_000_000)
+        self.assertEqual(cps109_a1.parse_rate("0.000001"), 1)
+        for text in ("", "-1.2", "1.2345678", "1.2.3", "abc", "0", "0.000000", ".5"):
+            with self.assertRaises(ValueError, msg=text):
+                cps109_a1.parse_rate(text)
+    def test_convert_rounding(self):
+        ''' test_convert_rounding '''
+        rates = cps109_a1.ExchangeRates([(date(2024, 1, 1), "USD", 1_005_000)])
+        day = date(2024, 1, 1)
+        self.assertEqual(rates.convert(100, "USD", day), 101)
+        self.assertEqual(rates.convert(-100, "USD", day), -101)
+        self.assertEqual(rates.convert(99, "USD", day), 99)
+        self.assertEqual(rates.convert(-99, "USD", day), -99)
+        self.assertEqual(rates.convert(-1234, cps109_a1.BASE_CURRENCY, day), -1234)
+        with self.assertRaises(ValueError):
+            rates.convert(100, "USD", date(2023, 12, 31))
+    def test_cached_lookups(self):
+        ''' test_cached_lookups '''
+        rates = cps109_a1.get_rates()
+        self.assertIs(rates, cps109_a1.get_rates())
+        self.assertEqual(rates.rate("USD", date(2024, 1, 31)), 1_350_000)
+        self.assertEqual(rates.rate("USD", date(2024, 2, 1)), 1_400_000)
+        self.assertEqual(rates._cache, {("USD", date(2024, 1, 31)): 1_350_000, ("USD", date(2024, 2, 1)): 1_400_000})
+        rates.rates["USD"][0] = 1
+        self.assertEqual(rates.rate("USD", date(2024, 1, 31)), 1_350_000)
+        self.assertEqual(rates.rate(cps109_a1.BASE_CURRENCY, date(2000, 1, 1)), cps109_a1.RATE_SCALE)
+    def test_rate_checked_on_entry(self):
+        ''' test_rate_checked_on_entry '''
+        with self.new_user() as user:
+            user.command("budget add expense food 10 usd")
+            self.assertEqual((user.items[-1].currency, cps109_a1.item_value(user.items[-1])), ("USD", -1400))
+            output = self.run_command(user, "budget add expense food 10 eur")
+            self.assertIn("No exchange rates for EUR", output)
+            output = self.run_command(user, "recurring add monthly expense rent 10 --from 2023-12-01 --currency usd")
+            self.assertIn("No USD rate on or before 2023-12-01", output)
+            user.command("recurring add monthly expense rent 10 --from 2024-01-01 --currency usd")
+            self.assertEqual((len(user.items), len(user.recurring)), (1, 1))
+    def test_missing_rate_reported(self):
+        ''' test_missing_rate_reported '''
+        with self.new_user() as user:
+            user.command("goal add limit food 100")
+            user.command("category add food")
+            user.command("budget add expense food 10 usd")
+            with open(cps109_a1.RATES_FILE, "w", encoding="utf-8") as file:
+                file.write("2100-01-01,USD,1.35\n")
+            cps109_a1.get_rates.cache_clear()
+            user._report = None
+            user._goal_index = None
+            for cmd in ("budget report", "goal list", "category list"):
+                output = self.run_command(user, cmd)
+                self.assertIn("No USD rate on or before", output, cmd)
+            self.assertIsNone(user._goal_index)
+
+
+
+if __name__ == '__main__':
+    unittest.main(exit=True)